@@ -0,0 +1,103 @@
+"""
+Benchmark del feed: bytes leídos desde Mongo y tiempo de serialización por
+página, antes (documento completo + JSON de FastAPI) y después (proyección
++ orjson). No necesita base de datos: genera documentos sintéticos.
+
+Uso (desde memeologia_back):
+
+    python -m benchmarks.bench_feed --limit 20 --comentarios 200 --likes 500
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+import bson
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from schema.schemas_nosql import PROYECCION_FEED
+
+
+def generar_meme(i: int, comentarios: int, likes: int) -> dict:
+    meme_id = ObjectId()
+    return {
+        "_id": meme_id,
+        "usuario_id": i % 100,
+        "url_s3": f"https://memeologia.s3.sa-east-1.amazonaws.com/meme_{i}.jpg",
+        "categoria": "Cualquiera",
+        "etiquetas": ["gatos", "humor", "random"],
+        "fecha_subida": datetime.now() - timedelta(minutes=i),
+        "estado": True,
+        "likes": likes,
+        "liked_by_users": list(range(likes)),
+        "comments": [
+            {
+                "_id": str(ObjectId()),
+                "usuario_id": str(c % 100),
+                "meme_id": str(meme_id),
+                "fecha": datetime.now(),
+                "contenido": "jajaja muy bueno este meme " * 3
+            }
+            for c in range(comentarios)
+        ],
+    }
+
+
+def proyectar(meme: dict) -> dict:
+    return {campo: valor for campo, valor in meme.items() if campo in PROYECCION_FEED}
+
+
+def a_feed(meme: dict) -> dict:
+    return {
+        "id": str(meme["_id"]),
+        "imageUrl": meme["url_s3"],
+        "thumbUrl": meme["url_s3"],
+        "usuario_id": meme["usuario_id"],
+        "usuario_nombre": f"usuario{meme['usuario_id']}",
+        "usuario_foto": "https://memeologia.s3.sa-east-1.amazonaws.com/cover2.jpg",
+        "likes": meme.get("likes", 0),
+        "liked_by_me": False,
+    }
+
+
+def medir(funcion, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) / repeticiones * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--comentarios", type=int, default=200)
+    parser.add_argument("--likes", type=int, default=500)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    pagina = [generar_meme(i, args.comentarios, args.likes) for i in range(args.limit)]
+    completos = [bson.encode(meme) for meme in pagina]
+    proyectados = [bson.encode(proyectar(meme)) for meme in pagina]
+
+    # Lectura: tamaño en BSON y tiempo de decodificación de la página
+    bytes_antes = sum(len(b) for b in completos)
+    bytes_despues = sum(len(b) for b in proyectados)
+    decod_antes = medir(lambda: [bson.decode(b) for b in completos], args.repeticiones)
+    decod_despues = medir(lambda: [bson.decode(b) for b in proyectados], args.repeticiones)
+
+    # Serialización: JSON de FastAPI (jsonable_encoder + json) contra orjson
+    respuesta = [a_feed(meme) for meme in pagina]
+    serial_antes = medir(lambda: json.dumps(jsonable_encoder(respuesta)).encode(), args.repeticiones)
+    serial_despues = medir(lambda: orjson.dumps(respuesta), args.repeticiones)
+
+    print(f"Página de {args.limit} memes ({args.comentarios} comentarios, {args.likes} likes embebidos)")
+    print(f"{'':24}{'antes':>12}{'después':>12}")
+    print(f"{'bytes leídos (BSON)':24}{bytes_antes:>12}{bytes_despues:>12}")
+    print(f"{'decodificación BSON ms':24}{decod_antes:>12.3f}{decod_despues:>12.3f}")
+    print(f"{'serialización JSON ms':24}{serial_antes:>12.3f}{serial_despues:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark del feed "trending" con muchos memes: ranking calculado en cada
+petición (aggregate sobre toda la colección) contra el puntaje materializado
+e indexado, más el costo de una actualización incremental y del decaimiento.
+
+Necesita un MongoDB (por ejemplo un mongod local); usa una base aparte.
+
+Uso (desde memeologia_back):
+
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.bench_trending --memes 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient, ReturnDocument
+
+from schema.schemas_nosql import ETAPA_SCORE, ORDEN_TRENDING, orden_trending
+
+
+def sembrar(coleccion, total: int, lote: int = 10000):
+    coleccion.drop()
+    ahora = datetime.utcnow()
+    for inicio in range(0, total, lote):
+        coleccion.insert_many([
+            {
+                "usuario_id": random.randint(1, 1000),
+                "url_s3": f"https://memeologia.s3.sa-east-1.amazonaws.com/meme_{i}.jpg",
+                "fecha_subida": ahora - timedelta(minutes=random.randint(0, 60 * 24 * 365)),
+                "likes": int(random.paretovariate(1.2)) - 1,
+                "comment_count": int(random.paretovariate(1.5)) - 1,
+            }
+            for i in range(inicio, min(inicio + lote, total))
+        ], ordered=False)
+    coleccion.create_index(ORDEN_TRENDING)
+
+
+def medir(funcion, repeticiones: int):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return statistics.median(tiempos), tiempos[int(len(tiempos) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memes", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--sin-sembrar", action="store_true", help="Reutiliza los datos de una ejecución anterior")
+    args = parser.parse_args()
+
+    coleccion = MongoClient(os.getenv("MONGODB_URI"))["memeologia_bench"]["memes"]
+    if not args.sin_sembrar:
+        inicio = time.perf_counter()
+        sembrar(coleccion, args.memes)
+        print(f"Sembrados {args.memes} memes en {time.perf_counter() - inicio:.1f} s")
+
+    # Decaimiento periódico (la primera vez calcula el puntaje de todos)
+    inicio = time.perf_counter()
+    campo, _ = orden_trending(1)
+    coleccion.update_many({}, [ETAPA_SCORE, {"$set": {campo: "$score"}}])
+    print(f"Decaimiento completo: {time.perf_counter() - inicio:.1f} s")
+
+    # Antes: ranking calculado en cada petición sobre toda la colección
+    calculado = [
+        {"$addFields": ETAPA_SCORE["$set"]},
+        {"$sort": {"score": -1, "_id": -1}},
+        {"$limit": args.limit},
+        {"$project": {"url_s3": 1, "usuario_id": 1, "score": 1}},
+    ]
+    antes = medir(lambda: list(coleccion.aggregate(calculado, allowDiskUse=True)), max(1, args.repeticiones // 4))
+
+    # Después: primera página con el puntaje vivo (el que actualiza cada like) leído con el índice
+    despues = medir(
+        lambda: list(coleccion.find({}, {"url_s3": 1, "usuario_id": 1, "score": 1}).sort(ORDEN_TRENDING).limit(args.limit)),
+        args.repeticiones
+    )
+
+    # Actualización incremental de un like
+    ids = [meme["_id"] for meme in coleccion.find({}, {"_id": 1}).limit(1000)]
+    incremental = medir(
+        lambda: coleccion.find_one_and_update(
+            {"_id": random.choice(ids)},
+            [{"$set": {"likes": {"$add": [{"$ifNull": ["$likes", 0]}, 1]}}}, ETAPA_SCORE],
+            projection={"likes": 1},
+            return_document=ReturnDocument.AFTER
+        ),
+        args.repeticiones * 10
+    )
+
+    print(f"{'':32}{'p50 ms':>10}{'p95 ms':>10}")
+    print(f"{'página calculada por petición':32}{antes[0]:>10.2f}{antes[1]:>10.2f}")
+    print(f"{'página con puntaje indexado':32}{despues[0]:>10.2f}{despues[1]:>10.2f}")
+    print(f"{'like + recálculo incremental':32}{incremental[0]:>10.2f}{incremental[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
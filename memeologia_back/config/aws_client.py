@@ -1,5 +1,11 @@
+import asyncio
+import mimetypes
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError
 from dotenv import load_dotenv
 from fastapi import HTTPException
@@ -9,43 +15,121 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 REGION = os.getenv("AWS_REGION")
 BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # Opcional, para S3 local/moto
 
-def upload_to_s3(file, filename):
+# Configuración del pool de conexiones y de las transferencias
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "20"))
+S3_UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", "8"))
+S3_MULTIPART_THRESHOLD = int(os.getenv("S3_MULTIPART_THRESHOLD", str(8 * 1024 * 1024)))
+S3_MULTIPART_CHUNKSIZE = int(os.getenv("S3_MULTIPART_CHUNKSIZE", str(8 * 1024 * 1024)))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "4"))
+
+
+def detectar_content_type(filename: str, content_type: str = None) -> str:
+    """Devuelve el ContentType del archivo, usando su extensión si no viene dado."""
+    if content_type:
+        return content_type
+    tipo, _ = mimetypes.guess_type(filename)
+    return tipo or "application/octet-stream"
+
+
+class S3Uploader:
     """
-    Sube un archivo a AWS S3 y devuelve la URL pública.
+    Servicio de subida a S3 de larga duración: reutiliza un único cliente
+    (con su pool de conexiones) y ejecuta las subidas en un pool de hilos
+    acotado para no bloquear el event loop.
     """
-    # Inicializar cliente de S3 con la región y las credenciale
-    try:
-        s3 = boto3.client(
-            's3',
-            region_name=REGION,  # Especifica la región si no está configurada por defecto
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-        )
-        print(f"Conectado a S3 en la región {REGION}")
-    except Exception as e:
-        print("Error al inicializar el cliente de S3:", e)
-        raise HTTPException(status_code=500, detail="No se pudo inicializar el cliente de S3")
-
-    try:
-        # Subir el archivo al bucket
-        print(f"Subiendo archivo al bucket '{BUCKET_NAME}' con nombre '{filename}'")
-        s3.upload_fileobj(
-            file,
-            BUCKET_NAME,
-            filename,
-            ExtraArgs={"ContentType": "image/jpeg"}  # Cambiar ContentType según el archivo
+
+    def __init__(
+        self,
+        bucket: str = BUCKET_NAME,
+        region: str = REGION,
+        client=None,
+        max_pool_connections: int = S3_MAX_POOL_CONNECTIONS,
+        workers: int = S3_UPLOAD_WORKERS,
+    ):
+        self.bucket = bucket
+        self.region = region
+        self.max_pool_connections = max_pool_connections
+        self._client = client
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s3-upload")
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=S3_MAX_CONCURRENCY,
         )
-        # Generar URL del archivo subido
-        url = f"https://{BUCKET_NAME}.s3.{REGION}.amazonaws.com/{filename}"
-        print("Archivo subido exitosamente:", url)
-        return url
-    except NoCredentialsError:
-        print("Error: No se encontraron credenciales de AWS")
-        raise HTTPException(status_code=500, detail="Error con las credenciales de AWS")
-    except PartialCredentialsError as e:
-        print("Error: Credenciales incompletas de AWS", e)
-        raise HTTPException(status_code=500, detail="Credenciales incompletas de AWS")
-    except Exception as e:
-        print("Error inesperado al subir archivo a S3:", e)
-        raise HTTPException(status_code=500, detail=f"Error al subir archivo a S3: {str(e)}")
+
+    @property
+    def client(self):
+        # El cliente se crea una sola vez y se comparte entre hilos
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = boto3.client(
+                            's3',
+                            region_name=self.region,
+                            endpoint_url=S3_ENDPOINT_URL,
+                            aws_access_key_id=AWS_ACCESS_KEY_ID,
+                            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                            config=Config(max_pool_connections=self.max_pool_connections),
+                        )
+                        print(f"Conectado a S3 en la región {self.region}")
+                    except Exception as e:
+                        print("Error al inicializar el cliente de S3:", e)
+                        raise HTTPException(status_code=500, detail="No se pudo inicializar el cliente de S3")
+        return self._client
+
+    def url(self, filename: str) -> str:
+        return f"https://{self.bucket}.s3.{self.region}.amazonaws.com/{filename}"
+
+    def upload(self, file, filename: str, content_type: str = None) -> str:
+        """
+        Sube un archivo a AWS S3 (en partes si es grande) y devuelve la URL pública.
+        """
+        try:
+            print(f"Subiendo archivo al bucket '{self.bucket}' con nombre '{filename}'")
+            self.client.upload_fileobj(
+                file,
+                self.bucket,
+                filename,
+                ExtraArgs={"ContentType": detectar_content_type(filename, content_type)},
+                Config=self.transfer_config,
+            )
+            url = self.url(filename)
+            print("Archivo subido exitosamente:", url)
+            return url
+        except HTTPException:
+            raise
+        except NoCredentialsError:
+            print("Error: No se encontraron credenciales de AWS")
+            raise HTTPException(status_code=500, detail="Error con las credenciales de AWS")
+        except PartialCredentialsError as e:
+            print("Error: Credenciales incompletas de AWS", e)
+            raise HTTPException(status_code=500, detail="Credenciales incompletas de AWS")
+        except Exception as e:
+            print("Error inesperado al subir archivo a S3:", e)
+            raise HTTPException(status_code=500, detail=f"Error al subir archivo a S3: {str(e)}")
+
+    async def upload_async(self, file, filename: str, content_type: str = None) -> str:
+        """Igual que `upload`, pero se ejecuta en el pool de hilos de S3."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.upload, file, filename, content_type)
+
+
+s3_uploader = S3Uploader()
+
+
+def upload_to_s3(file, filename, content_type: str = None):
+    """
+    Sube un archivo a AWS S3 y devuelve la URL pública.
+    """
+    return s3_uploader.upload(file, filename, content_type)
+
+
+async def upload_to_s3_async(file, filename, content_type: str = None):
+    """
+    Sube un archivo a AWS S3 sin bloquear el event loop y devuelve la URL pública.
+    """
+    return await s3_uploader.upload_async(file, filename, content_type)
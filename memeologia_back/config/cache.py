@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuración de la caché de perfiles de usuario
+PERFIL_CACHE_TTL = int(os.getenv("PERFIL_CACHE_TTL", "300"))  # Segundos
+PERFIL_CACHE_MAX = int(os.getenv("PERFIL_CACHE_MAX", "10000"))  # Entradas
+# Configuración de la caché de usuarios autenticados (token -> usuario)
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))  # Segundos, acotado además por la expiración del token
+PRINCIPAL_CACHE_MAX = int(os.getenv("PRINCIPAL_CACHE_MAX", "10000"))  # Entradas
+
+
+class TTLCache:
+    """
+    Caché en memoria del proceso con expiración por tiempo (TTL) y
+    desalojo LRU cuando se supera el número máximo de entradas.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave, default=None):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return default
+            valor, expira = entrada
+            if expira < time.monotonic():
+                # La entrada expiró, se elimina
+                del self._datos[clave]
+                return default
+            self._datos.move_to_end(clave)
+            return valor
+
+    def get_many(self, claves) -> dict:
+        """Devuelve un diccionario solo con las claves presentes y vigentes."""
+        encontrados = {}
+        ahora = time.monotonic()
+        with self._lock:
+            for clave in claves:
+                entrada = self._datos.get(clave)
+                if entrada is None:
+                    continue
+                valor, expira = entrada
+                if expira < ahora:
+                    del self._datos[clave]
+                    continue
+                self._datos.move_to_end(clave)
+                encontrados[clave] = valor
+        return encontrados
+
+    def set(self, clave, valor, ttl: float = None):
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            # Desalojar las entradas menos usadas recientemente
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+
+# Caché de (nombre, foto_perfil) por usuario_id usada por el feed
+perfiles_cache = TTLCache(maxsize=PERFIL_CACHE_MAX, ttl=PERFIL_CACHE_TTL)
+
+# Caché de usuarios autenticados por usuario_id usada por get_current_user
+principales_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAX, ttl=PRINCIPAL_CACHE_TTL)
@@ -1,7 +1,8 @@
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, MongoClient
 import os
 from dotenv import load_dotenv
-from passlib.context import CryptContext
+from config.hashing import pwd_context
 
 # Cargar las variables de entorno del archivo .env
 load_dotenv()
@@ -13,4 +14,45 @@ mongodb_uri = os.getenv("MONGODB_URI")
 client = MongoClient(mongodb_uri)
 db = client.memeologia_db
 memes_collection = db["memes"] 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+comments_collection = db["comments"]
+likes_collection = db["likes"]
+# Agregados por usuario (memes subidos, likes recibidos); _id = usuario_id
+estadisticas_collection = db["usuarios_estadisticas"]
+# Estado del ranking "trending" (época actual)
+trending_collection = db["trending_estado"]
+
+# Cliente asíncrono (motor) para los endpoints async, así una consulta lenta
+# no bloquea el event loop ni al resto de las peticiones
+async_client = AsyncIOMotorClient(mongodb_uri)
+async_db = async_client.memeologia_db
+async_memes_collection = async_db["memes"]
+async_comments_collection = async_db["comments"]
+async_likes_collection = async_db["likes"]
+async_estadisticas_collection = async_db["usuarios_estadisticas"]
+async_trending_collection = async_db["trending_estado"]
+
+def crear_indices():
+    """Crea los índices que necesitan las consultas de la API (idempotente)."""
+    # Índice para la paginación por cursor del feed, ordenado por (fecha_subida, _id)
+    memes_collection.create_index([("fecha_subida", DESCENDING), ("_id", DESCENDING)])
+    # Índice para listar los memes de un usuario en su perfil
+    memes_collection.create_index([("usuario_id", ASCENDING), ("fecha_subida", DESCENDING), ("_id", DESCENDING)])
+    # Índice del puntaje vivo, usado por el decaimiento periódico
+    memes_collection.create_index([("score", DESCENDING), ("_id", DESCENDING)])
+    # Índices del feed "trending", uno por cada campo de ranking que se rota
+    for campo in ("ranking_0", "ranking_1", "ranking_2"):
+        memes_collection.create_index([(campo, DESCENDING), ("_id", DESCENDING)])
+    # Búsqueda por etiquetas (multikey) y por categoría, en el orden del feed
+    memes_collection.create_index([("etiquetas", ASCENDING), ("fecha_subida", DESCENDING), ("_id", DESCENDING)])
+    memes_collection.create_index([("categoria", ASCENDING), ("fecha_subida", DESCENDING), ("_id", DESCENDING)])
+    # Búsqueda de texto libre sobre etiquetas y categoría
+    memes_collection.create_index([("etiquetas", TEXT), ("categoria", TEXT)], default_language="spanish")
+    # Búsqueda de duplicados exactos (SHA-256) y casi idénticos (bandas del hash perceptual)
+    memes_collection.create_index("sha256")
+    memes_collection.create_index([("phash_bandas", ASCENDING), ("_id", DESCENDING)])
+    # Índice para listar los comentarios de un meme en orden cronológico
+    comments_collection.create_index([("meme_id", ASCENDING), ("fecha", ASCENDING), ("_id", ASCENDING)])
+    # Un usuario solo puede dar un like por meme
+    likes_collection.create_index([("meme_id", ASCENDING), ("usuario_id", ASCENDING)], unique=True)
+    # Para buscar de una vez los likes de un usuario en una página del feed
+    likes_collection.create_index([("usuario_id", ASCENDING), ("meme_id", ASCENDING)])
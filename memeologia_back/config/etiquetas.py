@@ -0,0 +1,76 @@
+import threading
+from typing import Dict, Iterable, List
+
+# Cantidad de sugerencias que guarda cada nodo del trie
+MAX_SUGERENCIAS = 10
+
+
+def normalizar_etiqueta(etiqueta: str) -> str:
+    return etiqueta.strip().lower()
+
+
+class _Nodo:
+    __slots__ = ("hijos", "top")
+
+    def __init__(self):
+        self.hijos: Dict[str, "_Nodo"] = {}
+        # Etiquetas más usadas que empiezan con este prefijo, de mayor a menor uso
+        self.top: List[str] = []
+
+
+class TrieEtiquetas:
+    """
+    Trie en memoria para autocompletar etiquetas. Cada nodo guarda las
+    etiquetas más usadas con su prefijo, así una búsqueda solo recorre el
+    largo del prefijo. Se actualiza de forma incremental al subir memes.
+    """
+
+    def __init__(self, max_sugerencias: int = MAX_SUGERENCIAS):
+        self.max_sugerencias = max_sugerencias
+        self._raiz = _Nodo()
+        self._conteos: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _actualizar_top(self, nodo: _Nodo, etiqueta: str):
+        if etiqueta not in nodo.top:
+            nodo.top.append(etiqueta)
+        nodo.top.sort(key=lambda e: (-self._conteos[e], e))
+        del nodo.top[self.max_sugerencias:]
+
+    def agregar(self, etiqueta: str, cantidad: int = 1):
+        etiqueta = normalizar_etiqueta(etiqueta)
+        if not etiqueta:
+            return
+        with self._lock:
+            self._conteos[etiqueta] = self._conteos.get(etiqueta, 0) + cantidad
+            nodo = self._raiz
+            self._actualizar_top(nodo, etiqueta)
+            for letra in etiqueta:
+                nodo = nodo.hijos.setdefault(letra, _Nodo())
+                self._actualizar_top(nodo, etiqueta)
+
+    def agregar_varias(self, etiquetas: Iterable[str]):
+        for etiqueta in etiquetas:
+            self.agregar(etiqueta)
+
+    def buscar(self, prefijo: str, limite: int = MAX_SUGERENCIAS) -> List[dict]:
+        """Devuelve hasta `limite` etiquetas que empiezan con el prefijo, las más usadas primero."""
+        prefijo = normalizar_etiqueta(prefijo)
+        with self._lock:
+            nodo = self._raiz
+            for letra in prefijo:
+                nodo = nodo.hijos.get(letra)
+                if nodo is None:
+                    return []
+            return [{"etiqueta": e, "memes": self._conteos[e]} for e in nodo.top[:limite]]
+
+    def reconstruir(self, conteos: Dict[str, int]):
+        """Reemplaza todo el contenido con los conteos dados {etiqueta: cantidad}."""
+        nuevo = TrieEtiquetas(self.max_sugerencias)
+        for etiqueta, cantidad in conteos.items():
+            nuevo.agregar(etiqueta, cantidad)
+        with self._lock:
+            self._raiz, self._conteos = nuevo._raiz, nuevo._conteos
+
+
+trie_etiquetas = TrieEtiquetas()
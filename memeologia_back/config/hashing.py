@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from config.procesos import PoolProcesos
+
+load_dotenv()
+
+# Configuración del hash de contraseñas
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # Costo de bcrypt; si cambia, los hashes se actualizan al iniciar sesión
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_MAX_PENDIENTES = int(os.getenv("HASH_MAX_PENDIENTES", "64"))  # Máximo de hashes en cola o en ejecución
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+# Estas funciones se ejecutan en los procesos del pool, por eso están a nivel
+# de módulo y devuelven también cuándo empezaron y cuánto tardaron
+def _hashear(contraseña: str):
+    inicio = time.time()
+    resultado = pwd_context.hash(contraseña)
+    return resultado, inicio, time.time() - inicio
+
+def _verificar(contraseña: str, hash_almacenado: str):
+    inicio = time.time()
+    # verify_and_update devuelve un hash nuevo si el costo configurado cambió
+    resultado = pwd_context.verify_and_update(contraseña, hash_almacenado)
+    return resultado, inicio, time.time() - inicio
+
+
+class ServicioHash:
+    """
+    Ejecuta bcrypt en un pool de procesos dedicado para no ocupar el
+    threadpool del servidor. Si hay demasiados hashes pendientes responde
+    de inmediato con 503 en lugar de encolar más trabajo.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pendientes: int = HASH_MAX_PENDIENTES):
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self._pool = PoolProcesos(workers)
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        # Métricas
+        self._total = 0
+        self._rechazados = 0
+        self._espera_total = 0.0
+        self._espera_max = 0.0
+        self._hash_total = 0.0
+        self._hash_max = 0.0
+
+    async def _ejecutar(self, funcion, *args):
+        with self._lock:
+            if self._pendientes >= self.max_pendientes:
+                self._rechazados += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Servidor ocupado, intenta de nuevo en unos segundos",
+                    headers={"Retry-After": "1"}
+                )
+            self._pendientes += 1
+
+        try:
+            enviado = time.time()
+            # Se espera sin ocupar un hilo del servidor ni bloquear el event loop
+            resultado, inicio, duracion = await self._pool.ejecutar(funcion, *args)
+        except BrokenProcessPool:
+            # Un worker murió; el pool ya se descartó y la próxima petición usa uno nuevo
+            with self._lock:
+                self._rechazados += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Servidor ocupado, intenta de nuevo en unos segundos",
+                headers={"Retry-After": "1"}
+            )
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+
+        espera = max(0.0, inicio - enviado)
+        with self._lock:
+            self._total += 1
+            self._espera_total += espera
+            self._espera_max = max(self._espera_max, espera)
+            self._hash_total += duracion
+            self._hash_max = max(self._hash_max, duracion)
+        return resultado
+
+    async def hash(self, contraseña: str) -> str:
+        return await self._ejecutar(_hashear, contraseña)
+
+    async def verificar(self, contraseña: str, hash_almacenado: str):
+        """Devuelve (es_valida, hash_nuevo). hash_nuevo es None si no hay que actualizarlo."""
+        return await self._ejecutar(_verificar, contraseña, hash_almacenado)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            total = self._total or 1
+            return {
+                "workers": self.workers,
+                "pendientes": self._pendientes,
+                "max_pendientes": self.max_pendientes,
+                "completados": self._total,
+                "rechazados": self._rechazados,
+                "espera_cola_promedio_ms": self._espera_total / total * 1000,
+                "espera_cola_max_ms": self._espera_max * 1000,
+                "hash_promedio_ms": self._hash_total / total * 1000,
+                "hash_max_ms": self._hash_max * 1000,
+            }
+
+
+servicio_hash = ServicioHash()
@@ -0,0 +1,134 @@
+import logging
+import os
+from io import BytesIO
+from typing import Dict, Optional, Tuple, Union
+from dotenv import load_dotenv
+from PIL import Image, ImageOps
+from config.procesos import PoolProcesos
+
+load_dotenv()
+
+# Configuración del pipeline de imágenes
+IMAGEN_WORKERS = int(os.getenv("IMAGEN_WORKERS", "2"))
+CALIDAD_JPEG = int(os.getenv("CALIDAD_JPEG", "82"))
+CALIDAD_WEBP = int(os.getenv("CALIDAD_WEBP", "80"))
+# Hash perceptual: el hash de 64 bits se divide en bandas; dos hashes a una
+# distancia de Hamming menor que el número de bandas comparten al menos una
+PHASH_BANDAS = int(os.getenv("PHASH_BANDAS", "4"))
+PHASH_DISTANCIA_MAX = int(os.getenv("PHASH_DISTANCIA_MAX", str(PHASH_BANDAS - 1)))
+# Máximo de memes que se comparan por banda al buscar reposts
+PHASH_CANDIDATOS_POR_BANDA = int(os.getenv("PHASH_CANDIDATOS_POR_BANDA", "2000"))
+
+# Ancho máximo de cada variante (se mantiene la proporción)
+VARIANTES = {
+    "thumb": 320,
+    "feed": 720,
+}
+
+# Formato de salida según el formato original (sin WebP)
+_FORMATOS = {
+    "JPEG": ("JPEG", "image/jpeg", "jpg"),
+    "PNG": ("PNG", "image/png", "png"),
+}
+
+
+def _abrir(origen: Union[bytes, str]) -> Image.Image:
+    # Se acepta el contenido o la ruta de un archivo; con la ruta la imagen no
+    # se copia al proceso del pool y Pillow solo lee lo que necesita
+    return Image.open(BytesIO(origen) if isinstance(origen, bytes) else origen)
+
+
+def _guardar(imagen: Image.Image, formato: str) -> bytes:
+    salida = BytesIO()
+    # Algunos escritores (p. ej. PNG) copian los metadatos de `info`, así que
+    # se vacía antes de guardar para descartar EXIF, perfil ICC, textos, etc.
+    imagen.info = {}
+    if formato == "JPEG":
+        imagen.convert("RGB").save(salida, "JPEG", quality=CALIDAD_JPEG, optimize=True, progressive=True)
+    elif formato == "WEBP":
+        imagen.save(salida, "WEBP", quality=CALIDAD_WEBP, method=4)
+    else:
+        imagen.save(salida, formato, optimize=True)
+    return salida.getvalue()
+
+
+def generar_variantes(origen: Union[bytes, str]) -> Dict[str, Tuple[bytes, str, str]]:
+    """
+    Genera las variantes redimensionadas (en el formato original y en WebP)
+    de una imagen (contenido o ruta), sin metadatos. Devuelve {nombre: (bytes, content_type, extensión)}.
+    Los GIF animados no se procesan (se sirve el original para no perder la animación).
+    Se ejecuta en el pool de procesos, por eso está a nivel de módulo.
+    """
+    imagen = _abrir(origen)
+    if getattr(imagen, "is_animated", False):
+        return {}
+
+    formato, content_type, extension = _FORMATOS.get(imagen.format, _FORMATOS["PNG"])
+    # Aplicar la orientación EXIF antes de descartar los metadatos
+    imagen = ImageOps.exif_transpose(imagen)
+    if imagen.mode not in ("RGB", "RGBA"):
+        imagen = imagen.convert("RGBA" if imagen.mode in ("LA", "P", "PA") else "RGB")
+
+    variantes = {}
+    for nombre, ancho in VARIANTES.items():
+        copia = imagen.copy()
+        if copia.width > ancho:
+            copia.thumbnail((ancho, ancho * 10), Image.LANCZOS)
+        variantes[nombre] = (_guardar(copia, formato), content_type, extension)
+        variantes[f"{nombre}_webp"] = (_guardar(copia, "WEBP"), "image/webp", "webp")
+    return variantes
+
+
+def calcular_phash(imagen: Image.Image) -> str:
+    """Hash perceptual (dHash de 64 bits) en hexadecimal; en los GIF animados usa el primer fotograma."""
+    gris = imagen.convert("L").resize((9, 8), Image.LANCZOS)
+    pixeles = list(gris.getdata())
+    bits = 0
+    for fila in range(8):
+        for columna in range(8):
+            izquierda = pixeles[fila * 9 + columna]
+            derecha = pixeles[fila * 9 + columna + 1]
+            bits = (bits << 1) | (izquierda > derecha)
+    return f"{bits:016x}"
+
+
+def bandas_phash(phash: str):
+    """Divide el hash en PHASH_BANDAS partes, cada una con su posición ("0:a1b2", ...)."""
+    largo = len(phash) // PHASH_BANDAS
+    return [f"{i}:{phash[i * largo:(i + 1) * largo]}" for i in range(PHASH_BANDAS)]
+
+
+def distancia_hamming(phash_a: str, phash_b: str) -> int:
+    return bin(int(phash_a, 16) ^ int(phash_b, 16)).count("1")
+
+
+def procesar_imagen(origen: Union[bytes, str]) -> Tuple[Dict[str, Tuple[bytes, str, str]], str]:
+    """Genera las variantes y el hash perceptual de una imagen en una sola tarea del pool."""
+    phash = calcular_phash(_abrir(origen))
+    return generar_variantes(origen), phash
+
+
+_pool = PoolProcesos(IMAGEN_WORKERS)
+
+
+async def procesar_imagen_async(origen: Union[bytes, str]) -> Tuple[Dict[str, Tuple[bytes, str, str]], Optional[str]]:
+    """
+    Igual que `procesar_imagen`, pero en el pool de procesos.
+    Si la imagen no se puede decodificar devuelve ({}, None). Si un worker
+    murió se relanza BrokenProcessPool (el pool ya se descartó y se recrea).
+    """
+    try:
+        return await _pool.ejecutar(procesar_imagen, origen)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logging.warning("No se pudo procesar la imagen: %s", e)
+        return {}, None
+
+
+def elegir_variante(meme: dict, nombre: str) -> str:
+    """URL de la variante pedida en el formato original, o del original si no existe."""
+    return (meme.get("variantes") or {}).get(nombre, meme["url_s3"])
+
+
+def variante_webp(meme: dict, nombre: str) -> Optional[str]:
+    """URL de la versión WebP de la variante pedida, o None si no existe (p. ej. GIF animados)."""
+    return (meme.get("variantes") or {}).get(f"{nombre}_webp")
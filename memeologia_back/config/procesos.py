@@ -0,0 +1,52 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Los workers no se crean con fork: cuando se crea el pool el servidor ya tiene
+# hilos (monitores de motor, subidas a S3, anyio) y un fork puede heredar sus
+# locks tomados. forkserver no existe en Windows, ahí se usa spawn
+CONTEXTO_PROCESOS = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class PoolProcesos:
+    """
+    Pool de procesos que se crea bajo demanda y se vuelve a crear si se rompe
+    (por ejemplo si el sistema mata un worker por falta de memoria).
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=CONTEXTO_PROCESOS)
+        return self._executor
+
+    def _descartar(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            # Otra tarea pudo haberlo reemplazado ya
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def ejecutar(self, funcion, *args):
+        """
+        Ejecuta la función en el pool sin bloquear el event loop. Si el pool
+        está roto lo descarta (la próxima tarea usa uno nuevo) y relanza
+        BrokenProcessPool para que quien llama decida qué responder.
+        """
+        executor = self.executor
+        try:
+            return await asyncio.wrap_future(executor.submit(funcion, *args))
+        except BrokenProcessPool:
+            self._descartar(executor)
+            raise
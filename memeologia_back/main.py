@@ -1,13 +1,44 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi import FastAPI
 from routes.routes import router
 from config.database_sql import engine
+from config.database_nosql import crear_indices
 from models import models_sql
+from schema.schemas_nosql import decaer_scores, reconstruir_trie_etiquetas, reservar_decaimiento
 
-app = FastAPI()
+# Cada cuánto se recalcula el decaimiento del puntaje "trending" (segundos, 0 = desactivado)
+TRENDING_INTERVALO = int(os.getenv("TRENDING_INTERVALO", "600"))
+# Cada cuánto cada proceso revisa si le toca ejecutarlo
+TRENDING_REVISION = min(60, TRENDING_INTERVALO)
+
+async def decaer_scores_periodicamente():
+    while True:
+        try:
+            # Todos los procesos lo intentan, pero solo uno por intervalo obtiene la reserva
+            if await reservar_decaimiento(TRENDING_INTERVALO):
+                actualizados = await decaer_scores()
+                logging.info("Puntajes trending actualizados: %s", actualizados)
+        except Exception as e:
+            logging.warning("Error al actualizar los puntajes trending: %s", e)
+        await asyncio.sleep(TRENDING_REVISION)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tarea = asyncio.create_task(decaer_scores_periodicamente()) if TRENDING_INTERVALO > 0 else None
+    yield
+    if tarea:
+        tarea.cancel()
+
+app = FastAPI(lifespan=lifespan)
 
 
 models_sql.Base.metadata.create_all(bind=engine)
+crear_indices()
+reconstruir_trie_etiquetas()
 
 origins = [
     "http://200.104.72.42:3000",  # Puerto de tu frontend Next.js
@@ -34,6 +34,30 @@ class Comentario(BaseModel):
     fecha: datetime
     contenido: str
 
+# Página de comentarios con paginación por cursor
+class ComentariosPagina(BaseModel):
+    comments: List[Comentario]
+    next_cursor: Optional[str] = None
+    total: int = 0
+
+# Meme tal como se muestra en el feed
+class MemeFeed(BaseModel):
+    id: str
+    imageUrl: str
+    imageUrlWebp: Optional[str] = None
+    thumbUrl: str
+    thumbUrlWebp: Optional[str] = None
+    usuario_id: int
+    usuario_nombre: str
+    usuario_foto: str
+    likes: int = 0
+    liked_by_me: bool = False
+
+# Página del feed con paginación por cursor
+class FeedPagina(BaseModel):
+    memes: List[MemeFeed]
+    next_cursor: Optional[str] = None
+
 # Modelo Etiqueta
 class Etiqueta(BaseModel):
     id: Optional[ObjectId] = Field(alias="_id")
@@ -1,5 +1,5 @@
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict
 from sqlalchemy import Column, Integer, String, Date
 from sqlalchemy.orm import relationship
 from config.database_sql import Base, declarative_base
@@ -24,18 +24,42 @@ class UsuarioCreate(BaseModel):
         orm_mode = True  # Esto es necesario para que Pydantic pueda trabajar con SQLAlchemy
 
 
+# Usuario autenticado (sin la contraseña), es lo que se guarda en la caché de get_current_user
+class UsuarioActual(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    usuario_id: int
+    nombre: str
+    email: str
+    foto_perfil: str
+
+
 class LoginRequest(BaseModel):
     email: str
     contraseña: str
 
 class MemeOut(BaseModel):
-    _id: str
+    id: Optional[str] = None
     url_s3: str  # Asumiendo que cada meme tiene un campo 'url'
 
 class UsuarioOut(BaseModel):
     nombre: str
     foto_perfil: str
-    memes: List[MemeOut]  # Agrega una lista de memes
+    memes: List[MemeOut]  # Agrega una lista de memes (solo la primera página)
+    next_cursor: Optional[str] = None
+
+# Cabecera del perfil: datos y agregados del usuario, sin la lista de memes
+class PerfilHeader(BaseModel):
+    usuario_id: int
+    nombre: str
+    foto_perfil: str
+    memes: int = 0
+    likes: int = 0
+
+# Página de memes del perfil con paginación por cursor
+class MemesUsuarioPagina(BaseModel):
+    memes: List[MemeOut]
+    next_cursor: Optional[str] = None
     
 
 
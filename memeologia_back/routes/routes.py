@@ -1,32 +1,56 @@
 from datetime import date, datetime
 from io import BytesIO
 import logging
-from typing import List
-from fastapi import APIRouter, File, HTTPException, Depends, UploadFile, Form
+from typing import List, Literal, Optional, Union
+from fastapi import APIRouter, File, HTTPException, Depends, Query, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from config.database_nosql import memes_collection
+from config.database_nosql import async_comments_collection, async_memes_collection, memes_collection
 from bson import ObjectId
-from config.aws_client import upload_to_s3
-from models.models_nosql import Comentario
-from validation.validations import verificar_id
+from config.aws_client import upload_to_s3_async
+from models.models_nosql import Comentario, ComentariosPagina, FeedPagina, MemeFeed
 from schema.schemas_nosql import (
+    actualizar_contadores,
+    alternar_like,
+    buscar_memes,
     create_access_token,
     get_current_user,
+    get_estadisticas_usuario,
+    get_memes_con_like,
+    get_usuario_id_opcional,
     get_memes_by_usuario,
+    get_pagina_comentarios,
+    get_pagina_memes,
+    MEME_POR_DEFECTO,
+    ORDEN_FEED,
+    ORDEN_TRENDING,
+    PROYECCION_FEED,
     subir_meme_a_s3  # Importar la función de subida de memes a S3
 )
-from models.models_sql import LoginRequest, Usuario, UsuarioCreate, UsuarioOut
-from schema.schemas_sql import crear_usuario, login_usuario
+from models.models_sql import (
+    LoginRequest,
+    MemesUsuarioPagina,
+    PerfilHeader,
+    Usuario,
+    UsuarioActual,
+    UsuarioCreate,
+    UsuarioOut
+)
+from schema.schemas_sql import crear_usuario, invalidar_perfil, login_usuario, obtener_perfiles
 from config.database_sql import get_db
+from config.hashing import servicio_hash
+from config.imagenes import elegir_variante, variante_webp
+from config.etiquetas import MAX_SUGERENCIAS, trie_etiquetas
 from pydantic import BaseModel
 
 router = APIRouter()
 
 
 @router.post("/login")
-def login(request: LoginRequest, db: Session = Depends(get_db)):
+async def login(request: LoginRequest, db: Session = Depends(get_db)):
     # Llamar a la función para verificar las credenciales
-    usuario = login_usuario(db, request.email, request.contraseña)
+    usuario = await login_usuario(db, request.email, request.contraseña)
     
     if usuario is None:
         raise HTTPException(status_code=401, detail="Correo o contraseña incorrectos")
@@ -48,10 +72,16 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
     return auth_data
 
 
+# Métricas del pool de hashing de contraseñas
+@router.get("/metrics/hash")
+def hash_metrics():
+    return servicio_hash.metricas()
+
+
 # Ruta para insertar un usuario
 @router.post("/usuarios")
-def insert_usuario(usuario: UsuarioCreate, db: Session = Depends(get_db)):
-    return crear_usuario(db=db, nombre=usuario.nombre, email=usuario.email, contraseña=usuario.contraseña)
+async def insert_usuario(usuario: UsuarioCreate, db: Session = Depends(get_db)):
+    return await crear_usuario(db=db, nombre=usuario.nombre, email=usuario.email, contraseña=usuario.contraseña)
 
 # Subir un meme
 @router.post("/upload")
@@ -83,7 +113,7 @@ async def upload_photo( usuario_id: int, archivo: UploadFile = File(...), db: Se
         filename = f"{usuario_id}_profile_image.jpg"
         
         # Subir el archivo a S3
-        image_url =  upload_to_s3(archivo.file, filename)  # Espera la URL asincrónicamente
+        image_url = await upload_to_s3_async(archivo.file, filename, archivo.content_type)
 
         # Actualizar la URL en la base de datos
         usuario = db.query(Usuario).filter(Usuario.usuario_id == usuario_id).first()
@@ -92,6 +122,7 @@ async def upload_photo( usuario_id: int, archivo: UploadFile = File(...), db: Se
             usuario.foto_perfil = image_url
             db.commit()
             db.refresh(usuario)
+            invalidar_perfil(usuario_id)
             
             # Devuelve los datos como un diccionario
             return {"foto_perfil": image_url, "usuario_id": usuario.usuario_id, "nombre": usuario.nombre}
@@ -103,57 +134,159 @@ async def upload_photo( usuario_id: int, archivo: UploadFile = File(...), db: Se
 
 
 
-# Obtener un usuario y sus memes
-@router.get("/api/usuario/{usuario_id}", response_model=UsuarioOut)
-async def get_usuario(usuario_id: int, db: Session = Depends(get_db)):
-    # Obtener solo el nombre y la foto del perfil del usuario desde SQL
-    usuario = db.query(Usuario.nombre, Usuario.foto_perfil).filter(Usuario.usuario_id == usuario_id).first()
-
+def obtener_perfil(db: Session, usuario_id: int) -> dict:
+    # Nombre y foto del usuario desde la caché de perfiles (o SQL si no está)
+    usuario = obtener_perfiles(db, [usuario_id]).get(usuario_id)
     if not usuario:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return usuario
 
-    # Obtener los memes desde MongoDB
-    memes = get_memes_by_usuario(usuario_id)
+# Obtener un usuario y la primera página de sus memes
+@router.get("/api/usuario/{usuario_id}", response_model=UsuarioOut)
+async def get_usuario(usuario_id: int, limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    # Si el perfil no está en caché se consulta SQL, que es bloqueante
+    usuario = await run_in_threadpool(obtener_perfil, db, usuario_id)
+
+    # Obtener los memes desde MongoDB; el resto se pide a /api/usuario/{id}/memes
+    memes, next_cursor = await get_memes_by_usuario(usuario_id, limit=limit)
 
     return UsuarioOut(
-        nombre=usuario.nombre,
-        foto_perfil=usuario.foto_perfil,
-        memes=memes
+        nombre=usuario["nombre"],
+        foto_perfil=usuario["foto_perfil"],
+        memes=memes or [MEME_POR_DEFECTO],
+        next_cursor=next_cursor
     )
 
-# Obtener memes
-@router.get("/memes")
-def get_memes(page: int = 1, limit: int = 20, db: Session = Depends(get_db)):
-    skip = (page - 1) * limit
-    memes = memes_collection.find().skip(skip).limit(limit)
-    memes_list = list(memes)
+# Cabecera del perfil (nunca carga la lista de memes)
+@router.get("/api/usuario/{usuario_id}/header", response_model=PerfilHeader)
+async def get_usuario_header(usuario_id: int, db: Session = Depends(get_db)):
+    # Si el perfil no está en caché se consulta SQL, que es bloqueante
+    usuario = await run_in_threadpool(obtener_perfil, db, usuario_id)
+    estadisticas = await get_estadisticas_usuario(usuario_id)
+    return PerfilHeader(usuario_id=usuario_id, **usuario, **estadisticas)
+
+# Memes de un usuario (paginados por cursor)
+@router.get("/api/usuario/{usuario_id}/memes", response_model=MemesUsuarioPagina)
+async def get_usuario_memes(usuario_id: int, cursor: Optional[str] = None, limit: int = Query(20, ge=1, le=100)):
+    memes, next_cursor = await get_memes_by_usuario(usuario_id, cursor, limit)
+    return MemesUsuarioPagina(memes=memes, next_cursor=next_cursor)
+
+def armar_feed(db: Session, memes_list: List[dict], usuario_id: Optional[int]) -> List[dict]:
+    """Agrega a cada meme de la página los datos del autor y si el usuario actual le dio like."""
+    # Cargar los perfiles de todos los autores de la página en una sola consulta
+    perfiles = obtener_perfiles(db, {meme["usuario_id"] for meme in memes_list})
+    # Y los likes del usuario actual sobre la página, también en una sola consulta
+    con_like = get_memes_con_like(usuario_id, [meme["_id"] for meme in memes_list])
 
     memes_with_user_info = []
     for meme in memes_list:
-        usuario = db.query(Usuario.nombre, Usuario.foto_perfil).filter(Usuario.usuario_id == meme['usuario_id']).first()
+        usuario = perfiles.get(meme["usuario_id"])
         if not usuario:
-            raise HTTPException(status_code=404, detail="Usuario no encontrado")
-        
+            # Un usuario faltante no debe romper toda la página
+            logging.warning("Usuario %s no encontrado para el meme %s", meme["usuario_id"], meme["_id"])
+            continue
+
         memes_with_user_info.append({
             "id": str(meme["_id"]),
-            "imageUrl": meme["url_s3"],
+            "imageUrl": elegir_variante(meme, "feed"),
+            "imageUrlWebp": variante_webp(meme, "feed"),
+            "thumbUrl": elegir_variante(meme, "thumb"),
+            "thumbUrlWebp": variante_webp(meme, "thumb"),
             "usuario_id": meme["usuario_id"],
-            "usuario_nombre": usuario.nombre,
-            "usuario_foto": usuario.foto_perfil,
+            "usuario_nombre": usuario["nombre"],
+            "usuario_foto": usuario["foto_perfil"],
+            "likes": meme.get("likes", 0),
+            "liked_by_me": meme["_id"] in con_like,
         })
     return memes_with_user_info
 
+# Obtener memes
+@router.get("/memes", response_model=Union[List[MemeFeed], FeedPagina], response_class=ORJSONResponse)
+def get_memes(
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    sort: Literal["recientes", "trending"] = "recientes",
+    usuario_id: Optional[int] = Depends(get_usuario_id_opcional),
+    db: Session = Depends(get_db)
+):
+    """
+    Feed de memes. Si se envía `cursor` (vacío para la primera página) se usa
+    paginación por cursor y se responde {"memes": [...], "next_cursor": ...}.
+    Sin `cursor` se mantiene la paginación antigua con `page`/`limit`.
+    Con `sort=trending` la primera página (y la paginación con `page`) se
+    ordena por el puntaje vivo, que se recalcula con cada like y comentario.
+    Las páginas siguientes por cursor usan la copia del ranking de la última
+    ejecución del decaimiento, sin los memes ya mostrados, para que ninguno
+    se repita ni se salte; si el ranking se actualizó dos veces desde la
+    primera página se responde 410 y hay que volver a empezar.
+    Si la petición trae un token válido, cada meme indica si el usuario le dio like.
+    Cada meme trae la variante del feed y la miniatura en el formato original
+    y, si existen, también en WebP (`imageUrlWebp`, `thumbUrlWebp`); el
+    cliente elige con <picture>/srcset según los formatos que soporta.
+    La respuesta se serializa directamente con orjson (los datos ya tienen la
+    forma de MemeFeed, por lo que se omite la validación de FastAPI).
+    """
+    next_cursor = None
+    if cursor is not None:
+        memes_list, next_cursor = get_pagina_memes(cursor, limit, sort)
+    else:
+        skip = (page - 1) * limit
+        orden = ORDEN_TRENDING if sort == "trending" else ORDEN_FEED
+        memes = memes_collection.find({}, PROYECCION_FEED).sort(orden).skip(skip).limit(limit)
+        memes_list = list(memes)
+
+    memes_with_user_info = armar_feed(db, memes_list, usuario_id)
+
+    if cursor is not None:
+        return ORJSONResponse({"memes": memes_with_user_info, "next_cursor": next_cursor})
+    return ORJSONResponse(memes_with_user_info)
+
+
+# Buscar memes por etiquetas, categoría o texto (paginados por cursor)
+@router.get("/memes/search", response_model=FeedPagina, response_class=ORJSONResponse)
+def search_memes(
+    tags: List[str] = Query([]),
+    modo: Literal["and", "or"] = "and",
+    categoria: Optional[str] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    usuario_id: Optional[int] = Depends(get_usuario_id_opcional),
+    db: Session = Depends(get_db)
+):
+    """
+    Busca memes con todas (`modo=and`) o alguna (`modo=or`) de las etiquetas
+    dadas, opcionalmente filtrando por categoría y por texto libre (`q`).
+    """
+    memes_list, next_cursor = buscar_memes(tags, modo, categoria, q, cursor, limit)
+    return ORJSONResponse({"memes": armar_feed(db, memes_list, usuario_id), "next_cursor": next_cursor})
+
+# Autocompletar etiquetas por prefijo
+@router.get("/tags/autocomplete")
+def autocomplete_tags(q: str, limit: int = Query(10, ge=1, le=MAX_SUGERENCIAS)):
+    return trie_etiquetas.buscar(q, limit)
+
+
+# Ruta para obtener comentarios de un meme (paginados por cursor)
+@router.get("/memes/{meme_id}/comments", response_model=ComentariosPagina)
+async def get_comments(meme_id: str, cursor: Optional[str] = None, limit: int = Query(20, ge=1, le=100)):
+    try:
+        meme_object_id = ObjectId(meme_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="ID de meme inválido")
 
-# Ruta para obtener comentarios de un meme
-@router.get("/memes/{meme_id}/comments", response_model=List[Comentario])
-async def get_comments(meme_id: str):
-    meme = memes_collection.find_one({"_id": ObjectId(meme_id)})
+    # Solo se necesita el contador de comentarios del meme
+    meme = await async_memes_collection.find_one({"_id": meme_object_id}, {"comment_count": 1})
     if not meme:
         raise HTTPException(status_code=404, detail="Meme no encontrado")
-    
-    # Suponiendo que los comentarios están almacenados en el mismo documento del meme
-    comments = meme.get("comments", [])
-    return comments
+
+    comments, next_cursor = await get_pagina_comentarios(meme_id, cursor, limit)
+    return {
+        "comments": comments,
+        "next_cursor": next_cursor,
+        "total": meme.get("comment_count", 0)
+    }
 
 # Ruta para agregar un comentario a un meme
 
@@ -165,103 +298,68 @@ async def add_comment(meme_id: str, comment: Comentario):
     except Exception:
         raise HTTPException(status_code=400, detail="ID de meme inválido")
 
-    # Verificar si el meme existe
-    meme = memes_collection.find_one({"_id": meme_object_id})
-    if not meme:
-        raise HTTPException(status_code=404, detail="Meme no encontrado")
-
     # Crear un comentario
     comment_data = {
-        "_id": str(ObjectId()),  # Generar un _id para el comentario
+        "_id": ObjectId(),  # Generar un _id para el comentario
         "usuario_id": comment.usuario_id,
         "meme_id": meme_id,
         "fecha": comment.fecha or datetime.utcnow(),  # Si no se pasa fecha, usamos la fecha actual
         "contenido": comment.contenido
     }
 
-    # Agregar el comentario al array de comentarios
-    result = memes_collection.update_one(
-        {"_id": meme_object_id},
-        {"$push": {"comments": comment_data}}  # Usamos $push para agregar el comentario al array
-    )
+    # Guardar primero el comentario: si falla, el contador del meme no cambia
+    await async_comments_collection.insert_one(comment_data)
 
-    if result.modified_count == 0:
-        raise HTTPException(status_code=500, detail="No se pudo agregar el comentario")
+    # Incrementar el contador del meme (y su puntaje); si no devuelve nada el meme no existe
+    meme = await actualizar_contadores(meme_object_id, {"comment_count": 1}, {"_id": 1})
+    if not meme:
+        await async_comments_collection.delete_one({"_id": comment_data["_id"]})
+        raise HTTPException(status_code=404, detail="Meme no encontrado")
 
     # Retornar el comentario agregado
+    comment_data["_id"] = str(comment_data["_id"])
     return comment_data
 
 
 
 @router.post("/like-meme/{meme_id}")
-async def like_meme(meme_id: str, current_user: Usuario = Depends(get_current_user), db: Session = Depends(get_db)):
+async def like_meme(meme_id: str, current_user: UsuarioActual = Depends(get_current_user)):
     try:
         meme_object_id = ObjectId(meme_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"ID de meme inválido: {e}")
 
-    meme = memes_collection.find_one({"_id": meme_object_id})
+    # Solo se necesita saber que el meme existe
+    meme = await async_memes_collection.find_one({"_id": meme_object_id}, {"_id": 1})
     if not meme:
         raise HTTPException(status_code=404, detail="Meme no encontrado")
 
-    print("Meme encontrado:", meme)
-    print("Usuario actual:", current_user)
-
-    # Verificar que el usuario esté registrado
-    verificar_id(current_user.usuario_id, db)
-
-    # Verificar si el usuario ya ha dado like
-    if current_user.usuario_id in meme.get("liked_by_users", []):
-        # Si el usuario ya ha dado like, quitarlo
-        new_like_count = meme.get("likes", 0) - 1
-        memes_collection.update_one(
-            {"_id": meme_object_id},
-            {
-                "$set": {"likes": new_like_count},
-                "$pull": {"liked_by_users": current_user.usuario_id}
-            }
-        )
-        return {
-            "message": "Like eliminado",
-            "likes": new_like_count,
-            "meme_id": meme_id,
-            "liked_by_users": meme.get("liked_by_users", [])
-        }
-    else:
-        # Si el usuario no ha dado like, agregarlo
-        new_like_count = meme.get("likes", 0) + 1
-        memes_collection.update_one(
-            {"_id": meme_object_id},
-            {
-                "$set": {"likes": new_like_count},
-                "$push": {"liked_by_users": current_user.usuario_id}
-            }
-        )
-        return {
-            "message": "Like agregado",
-            "likes": new_like_count,
-            "meme_id": meme_id,
-            "liked_by_users": meme.get("liked_by_users", []) + [current_user.usuario_id]
-        }
+    # get_current_user ya verificó que el usuario esté registrado
+    liked, likes = await alternar_like(meme_object_id, current_user.usuario_id)
+    return {
+        "message": "Like agregado" if liked else "Like eliminado",
+        "likes": likes,
+        "meme_id": meme_id,
+        "liked": liked
+    }
 
 
 
 @router.post("/memes/{meme_id}/report")
 async def report_meme(
     meme_id: str,
-    current_user: Usuario = Depends(get_current_user),  # Verifica si el usuario está logueado
-    db: Session = Depends(get_db)
+    current_user: UsuarioActual = Depends(get_current_user)  # Verifica si el usuario está logueado
 ):
     # Verificar si el usuario está logueado
     if not current_user:
         raise HTTPException(status_code=401, detail="Usuario no autenticado")
 
-    meme = memes_collection.find_one({"_id": ObjectId(meme_id)})
+    meme = await async_memes_collection.find_one({"_id": ObjectId(meme_id)})
     if not meme:
         raise HTTPException(status_code=404, detail="Meme no encontrado")
     
     # Incrementar el contador de reportes
-    memes_collection.update_one(
+    await async_memes_collection.update_one(
         {"_id": ObjectId(meme_id)},
         {"$inc": {"reported_count": 1}}  # Se incrementa el contador de reportes
     )
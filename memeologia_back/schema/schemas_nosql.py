@@ -1,23 +1,48 @@
 
-from typing import Optional, List
+import asyncio
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+import time
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, NamedTuple, Optional, List, Tuple
 from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from config.database_nosql import db
-from config.aws_client import upload_to_s3  # Importar la función para subir a AWS S3
+from config.aws_client import upload_to_s3_async  # Importar la función para subir a AWS S3
+from config.etiquetas import normalizar_etiqueta, trie_etiquetas
+from config.imagenes import PHASH_CANDIDATOS_POR_BANDA, PHASH_DISTANCIA_MAX, bandas_phash, distancia_hamming, procesar_imagen_async
 from bson import ObjectId
 from datetime import datetime, timedelta
 from config.database_nosql import (
     pwd_context,
-    memes_collection)
+    memes_collection,
+    async_memes_collection,
+    async_comments_collection,
+    async_likes_collection,
+    async_estadisticas_collection,
+    likes_collection,
+    trending_collection,
+    async_trending_collection)
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
-from models.models_sql import Usuario
+from models.models_sql import Usuario, UsuarioActual
+from config.cache import PRINCIPAL_CACHE_TTL, principales_cache
 from config.database_sql import get_db
 from sqlalchemy.orm import Session
 
 # Asumiendo que el JWT contiene el ID del usuario
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+# Igual que el anterior pero no falla si no hay token (endpoints públicos)
+oauth2_scheme_opcional = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
 SECRET_KEY = "mi_clave_secreta"  # Cambia esto a una clave más segura
 ALGORITHM = "HS256"
@@ -31,7 +56,7 @@ def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes
     return encoded_jwt
 
 # Función para obtener el usuario desde el token JWT
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> UsuarioActual:
     try:
         # Decodificar el token JWT
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -40,16 +65,102 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         if usuario_id is None:
             raise HTTPException(status_code=401, detail="Usuario no encontrado en el token")
 
+        # Primero se busca en la caché para no consultar la base de datos en cada petición
+        usuario = principales_cache.get(usuario_id)
+        if usuario is not None:
+            return usuario
+
         # Buscar el usuario en la base de datos
         usuario = db.query(Usuario).filter(Usuario.usuario_id == usuario_id).first()
         if usuario is None:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
+        # La entrada nunca dura más que el token que la generó
+        usuario = UsuarioActual.model_validate(usuario)
+        restante = payload["exp"] - time.time() if "exp" in payload else PRINCIPAL_CACHE_TTL
+        principales_cache.set(usuario_id, usuario, ttl=min(PRINCIPAL_CACHE_TTL, restante))
+
         return usuario  # El usuario es devuelto para usarse en el endpoint
 
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
 
+# Devuelve el usuario_id del token si es válido, o None (no consulta la base de datos)
+def get_usuario_id_opcional(token: Optional[str] = Depends(oauth2_scheme_opcional)) -> Optional[int]:
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return payload.get("usuario_id")
+    except jwt.PyJWTError:
+        return None
+
+
+TAMAÑO_BLOQUE = 1024 * 1024  # Copia del archivo subido por bloques de 1 MB
+MAX_TAMAÑO_SUBIDA = int(os.getenv("MAX_TAMANO_SUBIDA", str(20 * 1024 * 1024)))  # Bytes
+
+def copiar_con_hash(origen, destino, max_bytes: int = MAX_TAMAÑO_SUBIDA) -> str:
+    """
+    Copia el archivo subido a `destino` por bloques calculando su SHA-256, sin
+    cargarlo entero en memoria. Responde 413 si supera `max_bytes`.
+    """
+    hasher = hashlib.sha256()
+    total = 0
+    while True:
+        bloque = origen.read(TAMAÑO_BLOQUE)
+        if not bloque:
+            break
+        total += len(bloque)
+        if total > max_bytes:
+            raise HTTPException(status_code=413, detail=f"El archivo supera el máximo de {max_bytes // (1024 * 1024)} MB")
+        hasher.update(bloque)
+        destino.write(bloque)
+    destino.flush()
+    return hasher.hexdigest()
+
+async def subir_variantes(variantes: Dict[str, Tuple[bytes, str, str]], base: str) -> Dict[str, str]:
+    """Sube a S3 en paralelo las variantes generadas de una imagen y devuelve {variante: url}."""
+    nombres = list(variantes)
+    urls = await asyncio.gather(*(
+        upload_to_s3_async(BytesIO(variantes[nombre][0]), f"variantes/{base}_{nombre}.{variantes[nombre][2]}", variantes[nombre][1])
+        for nombre in nombres
+    ))
+    return dict(zip(nombres, urls))
+
+async def buscar_reposts(phash: Optional[str], excluir: Optional[ObjectId] = None) -> List[ObjectId]:
+    """
+    Busca memes casi idénticos usando el índice de bandas del hash perceptual:
+    solo se comparan los candidatos que comparten alguna banda, sin recorrer
+    toda la colección. Devuelve los ids ordenados por distancia.
+
+    Cada banda se consulta por separado y trae como máximo
+    PHASH_CANDIDATOS_POR_BANDA memes, los más recientes primero. Las bandas
+    muy comunes (imágenes planas o solo texto, p. ej. "0:0000") quedan así
+    acotadas de forma determinista: en ellas solo se detectan reposts de los
+    memes más recientes, mientras que las demás bandas se revisan completas.
+    """
+    if not phash:
+        return []
+
+    async def candidatos_de_banda(banda: str) -> List[dict]:
+        filtro = {"phash_bandas": banda}
+        if excluir is not None:
+            filtro["_id"] = {"$ne": excluir}
+        memes = async_memes_collection.find(filtro, {"phash": 1}).sort("_id", DESCENDING)
+        return await memes.to_list(length=PHASH_CANDIDATOS_POR_BANDA)
+
+    candidatos = {}
+    for memes in await asyncio.gather(*(candidatos_de_banda(banda) for banda in bandas_phash(phash))):
+        for candidato in memes:
+            candidatos[candidato["_id"]] = candidato["phash"]
+
+    similares = []
+    for meme_id, phash_candidato in candidatos.items():
+        distancia = distancia_hamming(phash, phash_candidato)
+        if distancia <= PHASH_DISTANCIA_MAX:
+            similares.append((distancia, meme_id))
+    return [meme_id for _, meme_id in sorted(similares)]
+
 
 # Función para subir un meme con AWS S3
 async def subir_meme_a_s3(
@@ -68,26 +179,75 @@ async def subir_meme_a_s3(
     if archivo.content_type not in ["image/jpeg", "image/png", "image/gif"]:
         raise HTTPException(status_code=400, detail="Formato de archivo no soportado")
 
-    # Subir el archivo a AWS S3
+    # Las etiquetas se guardan normalizadas para que la búsqueda use el índice
+    etiquetas = list(dict.fromkeys(normalizar_etiqueta(e) for e in etiquetas if normalizar_etiqueta(e)))
+
+    extension = os.path.splitext(archivo.filename or "")[1].lower() or mimetypes.guess_extension(archivo.content_type) or ""
+    # El archivo se copia a un temporal con nombre: desde ahí se sube a S3 en
+    # partes y el pool de imágenes lo abre por su ruta, sin pasar los bytes
+    temporal = tempfile.NamedTemporaryFile(suffix=extension, delete=False)
     try:
-        s3_url = upload_to_s3(archivo.file, archivo.filename)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error al subir el archivo a S3: {str(e)}")
+        with temporal:
+            sha256 = await run_in_threadpool(copiar_con_hash, archivo.file, temporal)
+
+        # Si el mismo archivo ya se subió, se reutilizan su URL y variantes sin escribir en S3
+        existente = await async_memes_collection.find_one(
+            {"sha256": sha256}, {"url_s3": 1, "variantes": 1, "phash": 1}
+        )
+        if existente:
+            s3_url = existente["url_s3"]
+            variantes = existente.get("variantes", {})
+            phash = existente.get("phash")
+            repost_de = existente["_id"]
+        else:
+            # Subir el archivo original y sus variantes a AWS S3 con claves según su contenido
+            try:
+                with open(temporal.name, "rb") as original:
+                    s3_url = await upload_to_s3_async(original, f"memes/{sha256}{extension}", archivo.content_type)
+                variantes_generadas, phash = await procesar_imagen_async(temporal.name)
+                variantes = await subir_variantes(variantes_generadas, sha256)
+            except HTTPException:
+                raise
+            except BrokenProcessPool:
+                # Un worker del pool de imágenes murió (p. ej. sin memoria); el pool ya se recreó
+                raise HTTPException(status_code=503, detail="No se pudo procesar la imagen, intenta de nuevo")
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error al subir el archivo a S3: {str(e)}")
+            similares = await buscar_reposts(phash)
+            repost_de = similares[0] if similares else None
+    finally:
+        os.unlink(temporal.name)
 
     # Crear el registro en la base de datos
     meme_data = {
         "usuario_id": int_usuario_id,
         "url_s3": s3_url,
+        "variantes": variantes,
+        "sha256": sha256,
         "categoria": categoria,
         "etiquetas": etiquetas,
-        "fecha_subida": datetime.now(),
+        "fecha_subida": datetime.utcnow(),  # En UTC, igual que $$NOW en Mongo
         "estado": True  # Por defecto, el meme está activo
     }
-    result = db["memes"].insert_one(meme_data)
+    meme_data["score"] = calcular_score(0, 0, meme_data["fecha_subida"])
+    # Se agrega a todos los rankings para que aparezca en "trending" desde ya
+    for campo in CAMPOS_RANKING:
+        meme_data[campo] = meme_data["score"]
+    if phash:
+        meme_data["phash"] = phash
+        meme_data["phash_bandas"] = bandas_phash(phash)
+    if repost_de:
+        meme_data["repost_de"] = repost_de
+    result = await async_memes_collection.insert_one(meme_data)
+    trie_etiquetas.agregar_varias(etiquetas)
+    await async_estadisticas_collection.update_one(
+        {"_id": int_usuario_id}, {"$inc": {"memes": 1}}, upsert=True
+    )
 
     return {
         "id": str(result.inserted_id),
         "url_s3": s3_url,
+        "repost_de": str(repost_de) if repost_de else None,
         "mensaje": "Meme subido exitosamente"
     }
 
@@ -99,30 +259,348 @@ async def crear_meme(usuario_id: str, formato: str, estado: Optional[bool] = Fal
         raise HTTPException(status_code=400, detail="Usuario ID inválido")
     meme_data = {
         "usuario_id": ObjectId(usuario_id),
-        "fecha_subida": datetime.now(),
+        "fecha_subida": datetime.utcnow(),  # En UTC, igual que $$NOW en Mongo
         "formato": formato,
         "estado": estado
     }
-    result = db["memes"].insert_one(meme_data)
+    result = await async_memes_collection.insert_one(meme_data)
     return {"message": "Meme creado con éxito", "id": str(result.inserted_id)}
 
-def get_memes_by_usuario(usuario_id: int) -> List[dict]:
-    memes = memes_collection.find({"usuario_id": usuario_id})
-    
-    # Verificar si hay memes
-    memes_list = list(memes)  # Convertir el cursor en una lista
-    if len(memes_list) == 0:
-        return [
-            {
-                "url_s3": "https://memeologia.s3.sa-east-1.amazonaws.com/attachment-Walter-Dog-Texas-Meme.jpg",
-                "categoria": "Default",
-                "etiquetas": ["default"],
-                "fecha_subida": "2024-01-01",
-                "estado": True
-            }
+# Campos que realmente usan el feed y el perfil; así no se leen ni decodifican
+# los arrays grandes (comentarios, likes antiguos) de cada documento
+PROYECCION_FEED = {"_id": 1, "url_s3": 1, "variantes": 1, "usuario_id": 1, "fecha_subida": 1, "likes": 1, "score": 1}
+PROYECCION_PERFIL = {"_id": 1, "url_s3": 1, "fecha_subida": 1}
+
+# Meme que se muestra cuando el usuario todavía no subió ninguno
+MEME_POR_DEFECTO = {
+    "url_s3": "https://memeologia.s3.sa-east-1.amazonaws.com/attachment-Walter-Dog-Texas-Meme.jpg",
+    "categoria": "Default",
+    "etiquetas": ["default"],
+    "fecha_subida": "2024-01-01",
+    "estado": True
+}
+
+async def get_memes_by_usuario(usuario_id: int, cursor: Optional[str] = None, limit: int = 20) -> Tuple[List[dict], Optional[str]]:
+    """
+    Devuelve una página de los memes de un usuario (más recientes primero)
+    usando el índice (usuario_id, fecha_subida, _id), y el cursor siguiente.
+    """
+    filtro = {"usuario_id": usuario_id, **filtro_despues_de_cursor(cursor)}
+    memes = async_memes_collection.find(filtro, PROYECCION_PERFIL).sort(ORDEN_FEED)
+    memes_list, next_cursor = cortar_pagina(await memes.to_list(length=limit + 1), limit, "fecha_subida")
+    return [{"id": str(meme["_id"]), "url_s3": meme["url_s3"]} for meme in memes_list], next_cursor
+
+async def get_estadisticas_usuario(usuario_id: int) -> dict:
+    """Agregados del usuario (memes subidos y likes recibidos), mantenidos al subir y dar like."""
+    estadisticas = await async_estadisticas_collection.find_one({"_id": usuario_id})
+    return {
+        "memes": estadisticas.get("memes", 0) if estadisticas else 0,
+        "likes": estadisticas.get("likes", 0) if estadisticas else 0
+    }
+
+# Orden estable del feed: más recientes primero, desempate por _id
+ORDEN_FEED = [("fecha_subida", DESCENDING), ("_id", DESCENDING)]
+# Orden "trending" en vivo: mayor puntaje primero, desempate por _id. Se usa
+# en la primera página, así los likes y comentarios se ven de inmediato
+ORDEN_TRENDING = [("score", DESCENDING), ("_id", DESCENDING)]
+# Las páginas siguientes usan una copia del puntaje: cada ejecución del
+# decaimiento (una "época") lo copia a uno de estos campos, que se van
+# rotando. Así el orden no cambia mientras se pagina y sigue disponible
+# durante la época siguiente, aunque `score` cambie entre medio.
+CAMPOS_RANKING = ("ranking_0", "ranking_1", "ranking_2")
+# Orden de los comentarios: cronológico, desempate por _id
+ORDEN_COMENTARIOS = [("fecha", ASCENDING), ("_id", ASCENDING)]
+
+class Cursor(NamedTuple):
+    valor: object
+    doc_id: Optional[ObjectId]
+    epoca: Optional[int] = None
+    vistos: Tuple[ObjectId, ...] = ()
+
+def codificar_cursor(valor, doc_id, epoca: Optional[int] = None, vistos=()) -> str:
+    """Genera un cursor opaco a partir de la clave de orden del último documento de una página."""
+    es_fecha = isinstance(valor, datetime)
+    datos = {"v": valor.isoformat() if es_fecha else valor, "d": es_fecha, "i": str(doc_id) if doc_id else None}
+    if epoca is not None:
+        datos["e"] = epoca
+    if vistos:
+        datos["x"] = [str(meme_id) for meme_id in vistos]
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+
+def decodificar_cursor(cursor: str) -> Cursor:
+    try:
+        datos = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        valor = datetime.fromisoformat(datos["v"]) if datos["d"] else datos["v"]
+        epoca = datos.get("e")
+        # El valor va directo al filtro de Mongo: solo se aceptan fechas, números
+        # o null, nunca un objeto que Mongo interpretaría como operador ($ne, ...)
+        if isinstance(valor, bool) or not isinstance(valor, (datetime, int, float, type(None))):
+            raise ValueError("Valor de cursor inválido")
+        if epoca is not None and (isinstance(epoca, bool) or not isinstance(epoca, int)):
+            raise ValueError("Época de cursor inválida")
+        return Cursor(
+            valor,
+            ObjectId(datos["i"]) if datos["i"] else None,
+            epoca,
+            tuple(ObjectId(meme_id) for meme_id in datos.get("x", []))
+        )
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def filtro_despues_de_cursor(cursor: Optional[str], campo: str = "fecha_subida", descendente: bool = True) -> dict:
+    """Filtro de Mongo para los documentos que vienen después del cursor según (campo, _id)."""
+    if not cursor:
+        return {}
+    valor, doc_id, _, _ = decodificar_cursor(cursor)
+    if doc_id is None:
+        # Cursor que empieza desde el principio del orden
+        return {}
+    op = "$lt" if descendente else "$gt"
+    return {
+        "$or": [
+            {campo: {op: valor}},
+            {campo: valor, "_id": {op: doc_id}},
         ]
-    
-    return memes_list
+    }
+
+def cortar_pagina(docs: List[dict], limit: int, campo: str, epoca: Optional[int] = None, vistos=()) -> Tuple[List[dict], Optional[str]]:
+    """
+    Recibe hasta limit + 1 documentos; el extra solo indica que existe una
+    página siguiente. Devuelve la página y el cursor siguiente (o None).
+    """
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, codificar_cursor(docs[-1].get(campo), docs[-1]["_id"], epoca, vistos)
+
+def get_epoca_trending() -> int:
+    estado = trending_collection.find_one({"_id": "trending"}, {"epoca": 1})
+    return estado.get("epoca", 0) if estado else 0
+
+def orden_trending(epoca: int) -> Tuple[str, list]:
+    """Campo del ranking de la época dada y su orden (mayor puntaje primero, desempate por _id)."""
+    campo = CAMPOS_RANKING[epoca % len(CAMPOS_RANKING)]
+    return campo, [(campo, DESCENDING), ("_id", DESCENDING)]
+
+def epoca_del_cursor(cursor: Cursor) -> int:
+    """
+    Época del ranking con la que se sigue paginando. Un cursor sirve durante
+    su época y la siguiente; después su campo se reutiliza y se responde 410.
+    """
+    actual = get_epoca_trending()
+    if cursor.epoca is None or not actual - 1 <= cursor.epoca <= actual:
+        raise HTTPException(status_code=410, detail="El ranking trending se actualizó, vuelve a pedir la primera página")
+    return cursor.epoca
+
+def get_pagina_trending(cursor: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """
+    Página del feed "trending". La primera se ordena por el puntaje vivo; las
+    siguientes recorren la copia del ranking de la época en que se pidió la
+    primera, sin los memes que ya se mostraron en ella (van en el cursor).
+    Así ningún meme se repite ni se salta aunque los puntajes cambien.
+    """
+    if not cursor:
+        memes_list = list(memes_collection.find({}, PROYECCION_FEED).sort(ORDEN_TRENDING).limit(limit + 1))
+        if len(memes_list) <= limit:
+            return memes_list, None
+        memes_list = memes_list[:limit]
+        return memes_list, codificar_cursor(None, None, get_epoca_trending(), [meme["_id"] for meme in memes_list])
+
+    datos = decodificar_cursor(cursor)
+    epoca = epoca_del_cursor(datos)
+    campo, orden = orden_trending(epoca)
+    condiciones = [{"_id": {"$nin": list(datos.vistos)}}]
+    filtro_cursor = filtro_despues_de_cursor(cursor, campo)
+    if filtro_cursor:
+        condiciones.append(filtro_cursor)
+    memes_list = list(
+        memes_collection.find({"$and": condiciones}, {**PROYECCION_FEED, campo: 1}).sort(orden).limit(limit + 1)
+    )
+    return cortar_pagina(memes_list, limit, campo, epoca, datos.vistos)
+
+def get_pagina_memes(cursor: Optional[str], limit: int, sort: str = "recientes") -> Tuple[List[dict], Optional[str]]:
+    """
+    Devuelve una página del feed usando paginación por cursor (keyset) y el
+    cursor de la página siguiente, o None si no quedan más memes.
+    """
+    if sort == "trending":
+        return get_pagina_trending(cursor, limit)
+    memes_list = list(
+        memes_collection.find(filtro_despues_de_cursor(cursor), PROYECCION_FEED).sort(ORDEN_FEED).limit(limit + 1)
+    )
+    return cortar_pagina(memes_list, limit, "fecha_subida")
+
+def buscar_memes(
+    etiquetas: List[str],
+    modo: str,
+    categoria: Optional[str],
+    texto: Optional[str],
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    Búsqueda por etiquetas (todas con modo "and", alguna con "or"), categoría y
+    texto, paginada por cursor en el orden del feed. Usa los índices de
+    `etiquetas`, `categoria` y el índice de texto.
+    """
+    condiciones = []
+    etiquetas = [normalizar_etiqueta(e) for e in etiquetas if normalizar_etiqueta(e)]
+    if etiquetas:
+        condiciones.append({"etiquetas": {"$all" if modo == "and" else "$in": etiquetas}})
+    if categoria:
+        condiciones.append({"categoria": categoria})
+    if texto:
+        condiciones.append({"$text": {"$search": texto}})
+    filtro_cursor = filtro_despues_de_cursor(cursor)
+    if filtro_cursor:
+        condiciones.append(filtro_cursor)
+
+    filtro = {"$and": condiciones} if condiciones else {}
+    memes_list = list(memes_collection.find(filtro, PROYECCION_FEED).sort(ORDEN_FEED).limit(limit + 1))
+    return cortar_pagina(memes_list, limit, "fecha_subida")
+
+def reconstruir_trie_etiquetas():
+    """Reconstruye el trie de autocompletado con el conteo de memes de cada etiqueta."""
+    conteos = memes_collection.aggregate([
+        {"$unwind": "$etiquetas"},
+        {"$group": {"_id": "$etiquetas", "memes": {"$sum": 1}}}
+    ])
+    trie_etiquetas.reconstruir({c["_id"]: c["memes"] for c in conteos if isinstance(c["_id"], str)})
+
+async def get_pagina_comentarios(meme_id: str, cursor: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Devuelve una página de comentarios de un meme en orden cronológico."""
+    filtro = {"meme_id": meme_id, **filtro_despues_de_cursor(cursor, "fecha", descendente=False)}
+    comentarios = await async_comments_collection.find(filtro).sort(ORDEN_COMENTARIOS).to_list(length=limit + 1)
+    return cortar_pagina(comentarios, limit, "fecha")
+
+# Puntaje "trending": (likes + PESO_COMENTARIO * comentarios + 1) / (horas + 2) ^ GRAVEDAD
+TRENDING_PESO_COMENTARIO = float(os.getenv("TRENDING_PESO_COMENTARIO", "2"))
+TRENDING_GRAVEDAD = float(os.getenv("TRENDING_GRAVEDAD", "1.8"))
+# Por debajo de este puntaje el decaimiento periódico deja de actualizar el meme
+TRENDING_SCORE_MINIMO = float(os.getenv("TRENDING_SCORE_MINIMO", "0.0001"))
+
+def calcular_score(likes: int, comentarios: int, fecha_subida: datetime) -> float:
+    # fecha_subida se guarda en UTC, así la edad coincide con la de ETAPA_SCORE ($$NOW)
+    horas = max(0.0, (datetime.utcnow() - fecha_subida).total_seconds() / 3600)
+    return (likes + TRENDING_PESO_COMENTARIO * comentarios + 1) / (horas + 2) ** TRENDING_GRAVEDAD
+
+# La misma fórmula como etapa de un pipeline de actualización, para recalcular
+# el puntaje en el servidor de forma atómica junto con los contadores
+ETAPA_SCORE = {
+    "$set": {
+        "score": {
+            "$divide": [
+                {"$add": [
+                    {"$ifNull": ["$likes", 0]},
+                    {"$multiply": [TRENDING_PESO_COMENTARIO, {"$ifNull": ["$comment_count", 0]}]},
+                    1
+                ]},
+                {"$pow": [
+                    {"$add": [{"$max": [0, {"$divide": [{"$subtract": ["$$NOW", "$fecha_subida"]}, 3600 * 1000]}]}, 2]},
+                    TRENDING_GRAVEDAD
+                ]}
+            ]
+        }
+    }
+}
+
+async def actualizar_contadores(meme_object_id: ObjectId, incrementos: Dict[str, int], projection: dict) -> Optional[dict]:
+    """
+    Incrementa contadores del meme (likes, comment_count) y recalcula su
+    puntaje "trending" en una sola actualización atómica. Devuelve el meme
+    actualizado o None si no existe.
+    """
+    pipeline = [
+        {"$set": {campo: {"$add": [{"$ifNull": [f"${campo}", 0]}, delta]} for campo, delta in incrementos.items()}},
+        ETAPA_SCORE
+    ]
+    return await async_memes_collection.find_one_and_update(
+        {"_id": meme_object_id},
+        pipeline,
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
+
+async def decaer_scores() -> int:
+    """
+    Recalcula el puntaje de los memes que todavía pueden aparecer en "trending"
+    (o que aún no tienen puntaje) y lo copia al campo de ranking de una nueva
+    época, que se publica al terminar. El índice de `score` evita recorrer los
+    memes que ya decayeron por debajo del mínimo. Devuelve cuántos se actualizaron.
+    """
+    estado = await async_trending_collection.find_one({"_id": "trending"}, {"epoca": 1})
+    epoca = (estado.get("epoca", 0) if estado else 0) + 1
+    campo, _ = orden_trending(epoca)
+
+    result = await async_memes_collection.update_many(
+        {
+            "fecha_subida": {"$type": "date"},
+            "$or": [{"score": {"$gt": TRENDING_SCORE_MINIMO}}, {"score": {"$exists": False}}]
+        },
+        [ETAPA_SCORE, {"$set": {campo: "$score"}}]
+    )
+    await async_trending_collection.update_one({"_id": "trending"}, {"$set": {"epoca": epoca}}, upsert=True)
+    return result.modified_count
+
+async def reservar_decaimiento(intervalo: float) -> bool:
+    """
+    Reserva la próxima ejecución del decaimiento en el documento de estado.
+    Con varios procesos o réplicas solo uno la obtiene por intervalo, así la
+    época avanza una vez por intervalo y no hay ejecuciones superpuestas
+    (mientras cada una dure menos que el intervalo).
+    """
+    ahora = datetime.utcnow()
+    try:
+        await async_trending_collection.update_one(
+            {
+                "_id": "trending",
+                "$or": [{"proximo_decaimiento": {"$lte": ahora}}, {"proximo_decaimiento": {"$exists": False}}]
+            },
+            {"$set": {"proximo_decaimiento": ahora + timedelta(seconds=intervalo)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # El documento existe pero la reserva sigue vigente: otro proceso la tiene
+        return False
+
+async def alternar_like(meme_object_id: ObjectId, usuario_id: int) -> Tuple[bool, int]:
+    """
+    Da o quita el like de un usuario de forma atómica. El índice único
+    (meme_id, usuario_id) evita likes duplicados y el contador del meme solo
+    cambia cuando el like realmente cambió.
+    Devuelve (tiene_like, likes).
+    """
+    filtro = {"meme_id": meme_object_id, "usuario_id": usuario_id}
+
+    eliminado = await async_likes_collection.delete_one(filtro)
+    if eliminado.deleted_count:
+        liked, delta = False, -1
+    else:
+        try:
+            await async_likes_collection.insert_one({**filtro, "fecha": datetime.utcnow()})
+            liked, delta = True, 1
+        except DuplicateKeyError:
+            # Otra petición concurrente ya registró el like
+            liked, delta = True, 0
+
+    meme = await actualizar_contadores(meme_object_id, {"likes": delta}, {"likes": 1, "usuario_id": 1})
+    if meme and delta:
+        # Mantener el total de likes recibidos por el autor del meme
+        await async_estadisticas_collection.update_one(
+            {"_id": meme["usuario_id"]}, {"$inc": {"likes": delta}}, upsert=True
+        )
+    return liked, meme.get("likes", 0) if meme else 0
+
+def get_memes_con_like(usuario_id: Optional[int], meme_ids: List[ObjectId]) -> set:
+    """Devuelve, en una sola consulta, los ids de los memes de la lista a los que el usuario dio like."""
+    if usuario_id is None or not meme_ids:
+        return set()
+    likes = likes_collection.find(
+        {"usuario_id": usuario_id, "meme_id": {"$in": list(meme_ids)}},
+        {"meme_id": 1, "_id": 0}
+    )
+    return {like["meme_id"] for like in likes}
 
 def get_all_memes_urls() -> List[str]:
     """
@@ -1,42 +1,84 @@
 from validation.validations import  (
 
-    verificar_contraseña,
     verificar_usuario_existente,
     validar_usuario,
     validar_correo,
     validar_contraseña
 )
-from config.database_nosql import pwd_context
+from config.hashing import servicio_hash
+from config.cache import perfiles_cache, principales_cache
 from datetime import datetime
+from typing import Dict, Iterable
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from models.models_sql import  Usuario
 
 
-def crear_usuario(db: Session, nombre: str, email: str, contraseña: str):
-    # Realiza las validaciones
-    verificar_usuario_existente(db, email, nombre)
+async def crear_usuario(db: Session, nombre: str, email: str, contraseña: str):
+    # Realiza las validaciones (las consultas SQL van al threadpool)
+    await run_in_threadpool(verificar_usuario_existente, db, email, nombre)
     validar_usuario(nombre)
     validar_correo( email)
     validar_contraseña(contraseña)
     # Hashear la contraseña antes de almacenarla
-    hashed_contraseña = pwd_context.hash(contraseña)
+    # (en el pool de procesos de hashing, responde 503 si está saturado)
+    hashed_contraseña = await servicio_hash.hash(contraseña)
     fecha_registro= datetime.now().date()
 
     # Crear nuevo usuario
     nuevo_usuario = Usuario(nombre=nombre, email=email, contraseña=hashed_contraseña, fecha_registro=fecha_registro)
-    db.add(nuevo_usuario)
-    db.commit()
-    db.refresh(nuevo_usuario)
+
+    def guardar():
+        db.add(nuevo_usuario)
+        db.commit()
+        db.refresh(nuevo_usuario)
+
+    await run_in_threadpool(guardar)
     return {"id": nuevo_usuario.usuario_id}
 
-def login_usuario(db: Session, email: str, contraseña: str):
+async def login_usuario(db: Session, email: str, contraseña: str):
     # Buscar al usuario por correo
-    usuario = db.query(Usuario).filter(Usuario.email == email).first()
+    usuario = await run_in_threadpool(lambda: db.query(Usuario).filter(Usuario.email == email).first())
     
-    # Si el usuario no existe o la contraseña es incorrecta
-    if usuario is None or not verificar_contraseña(usuario.contraseña, contraseña):
+    if usuario is None:
         return None  # O lanzar un error de autenticación
+
+    # Si la contraseña es incorrecta
+    es_valida, hash_nuevo = await servicio_hash.verificar(contraseña, usuario.contraseña)
+    if not es_valida:
+        return None
+
+    # Si cambió el costo de bcrypt configurado, se guarda el hash actualizado
+    if hash_nuevo:
+        usuario.contraseña = hash_nuevo
+        await run_in_threadpool(db.commit)
     
     # Devolver solo el ID del usuario
     return usuario  # Ahora devuelve el objeto usuario completo
 
+
+def obtener_perfiles(db: Session, usuario_ids: Iterable[int]) -> Dict[int, dict]:
+    """
+    Devuelve {usuario_id: {"nombre", "foto_perfil"}} para los ids dados.
+    Primero consulta la caché de perfiles y los que faltan se cargan con una
+    sola consulta IN. Los ids que no existen simplemente no aparecen.
+    """
+    ids = set(usuario_ids)
+    perfiles = perfiles_cache.get_many(ids)
+
+    faltantes = ids - perfiles.keys()
+    if faltantes:
+        filas = db.query(Usuario.usuario_id, Usuario.nombre, Usuario.foto_perfil).filter(
+            Usuario.usuario_id.in_(faltantes)
+        ).all()
+        for fila in filas:
+            perfil = {"nombre": fila.nombre, "foto_perfil": fila.foto_perfil}
+            perfiles_cache.set(fila.usuario_id, perfil)
+            perfiles[fila.usuario_id] = perfil
+
+    return perfiles
+
+def invalidar_perfil(usuario_id: int):
+    # Eliminar el perfil y el usuario autenticado de las cachés cuando cambian sus datos
+    perfiles_cache.delete(usuario_id)
+    principales_cache.delete(usuario_id)
@@ -0,0 +1,57 @@
+"""
+Genera las variantes (miniatura, feed y WebP) y los hashes (SHA-256 y
+perceptual) de los memes que se subieron antes del pipeline de imágenes
+y los guarda en el documento del meme.
+
+Uso (desde memeologia_back):
+
+    python -m scripts.backfill_variantes [--limite N]
+"""
+import argparse
+import asyncio
+import hashlib
+from urllib.parse import unquote, urlparse
+from config.aws_client import s3_uploader
+from config.database_nosql import async_memes_collection
+from config.imagenes import bandas_phash, procesar_imagen_async
+from schema.schemas_nosql import subir_variantes
+
+
+def clave_desde_url(url: str) -> str:
+    # https://<bucket>.s3.<region>.amazonaws.com/<clave>
+    return unquote(urlparse(url).path.lstrip("/"))
+
+
+async def backfill_variantes(limite: int = 0):
+    procesados = 0
+    pendientes = {"$or": [{"variantes": {"$exists": False}}, {"sha256": {"$exists": False}}]}
+    memes = async_memes_collection.find(pendientes, {"url_s3": 1}).limit(limite)
+
+    async for meme in memes:
+        clave = clave_desde_url(meme["url_s3"])
+        try:
+            respuesta = await asyncio.to_thread(s3_uploader.client.get_object, Bucket=s3_uploader.bucket, Key=clave)
+            contenido = await asyncio.to_thread(respuesta["Body"].read)
+            sha256 = hashlib.sha256(contenido).hexdigest()
+            variantes_generadas, phash = await procesar_imagen_async(contenido)
+            variantes = await subir_variantes(variantes_generadas, sha256)
+        except Exception as e:
+            print(f"Error con el meme {meme['_id']} ({clave}): {e}")
+            continue
+
+        # Las variantes se guardan aunque estén vacías (p. ej. GIF animado) para no reprocesarlo
+        cambios = {"variantes": variantes, "sha256": sha256}
+        if phash:
+            cambios["phash"] = phash
+            cambios["phash_bandas"] = bandas_phash(phash)
+        await async_memes_collection.update_one({"_id": meme["_id"]}, {"$set": cambios})
+        procesados += 1
+
+    print(f"Memes procesados: {procesados}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limite", type=int, default=0, help="Máximo de memes a procesar (0 = todos)")
+    args = parser.parse_args()
+    asyncio.run(backfill_variantes(args.limite))
@@ -0,0 +1,30 @@
+"""
+Migración única: los memes subidos antes de guardar `fecha_subida` en UTC
+tienen la hora local del servidor. Este script les suma el desfase para que
+su edad en el puntaje "trending" se calcule igual que la de los nuevos.
+
+Ejecutar una sola vez, indicando el desfase UTC del servidor que los subió y
+el momento (UTC) del despliegue que empezó a guardar las fechas en UTC:
+
+    python -m scripts.fechas_a_utc --offset-horas -3 --antes-de 2026-10-17T12:00:00
+"""
+import argparse
+from datetime import datetime
+from config.database_nosql import memes_collection
+
+
+def fechas_a_utc(offset_horas: float, antes_de: datetime):
+    # hora local = UTC + offset  =>  UTC = hora local - offset
+    result = memes_collection.update_many(
+        {"fecha_subida": {"$type": "date", "$lt": antes_de}},
+        [{"$set": {"fecha_subida": {"$add": ["$fecha_subida", -offset_horas * 3600 * 1000]}}}]
+    )
+    print(f"Memes actualizados: {result.modified_count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--offset-horas", type=float, required=True, help="Desfase UTC del servidor anterior, p. ej. -3")
+    parser.add_argument("--antes-de", type=datetime.fromisoformat, required=True, help="Fecha UTC del despliegue")
+    args = parser.parse_args()
+    fechas_a_utc(args.offset_horas, args.antes_de)
@@ -0,0 +1,51 @@
+"""
+Migración única: mueve los comentarios embebidos en el array `comments` de
+cada meme a la colección `comments` y deja el contador `comment_count`.
+
+Uso (desde memeologia_back):
+
+    python -m scripts.migrar_comentarios
+"""
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from config.database_nosql import comments_collection, crear_indices, memes_collection
+
+
+def migrar_comentarios():
+    crear_indices()
+    migrados = 0
+
+    # Solo se recorren los memes que todavía tienen comentarios embebidos
+    for meme in memes_collection.find({"comments": {"$exists": True}}, {"comments": 1}):
+        meme_id = str(meme["_id"])
+        comentarios = []
+        for comentario in meme.get("comments", []):
+            comentario = dict(comentario)
+            # Los comentarios antiguos guardaban el _id como string
+            if ObjectId.is_valid(comentario.get("_id")):
+                comentario["_id"] = ObjectId(comentario["_id"])
+            else:
+                comentario["_id"] = ObjectId()
+            comentario["meme_id"] = meme_id
+            comentarios.append(comentario)
+
+        if comentarios:
+            try:
+                comments_collection.insert_many(comentarios, ordered=False)
+            except BulkWriteError as e:
+                # Ignorar duplicados si la migración se ejecuta más de una vez
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+
+        total = comments_collection.count_documents({"meme_id": meme_id})
+        memes_collection.update_one(
+            {"_id": meme["_id"]},
+            {"$set": {"comment_count": total}, "$unset": {"comments": ""}}
+        )
+        migrados += len(comentarios)
+
+    print(f"Comentarios migrados: {migrados}")
+
+
+if __name__ == "__main__":
+    migrar_comentarios()
@@ -0,0 +1,42 @@
+"""
+Migración única: mueve los likes guardados en el array `liked_by_users` de
+cada meme a la colección `likes` y recalcula el contador `likes`.
+
+Uso (desde memeologia_back):
+
+    python -m scripts.migrar_likes
+"""
+from datetime import datetime
+from pymongo import UpdateOne
+from config.database_nosql import crear_indices, likes_collection, memes_collection
+
+
+def migrar_likes():
+    crear_indices()
+    migrados = 0
+
+    for meme in memes_collection.find({"liked_by_users": {"$exists": True}}, {"liked_by_users": 1}):
+        # upsert para que la migración se pueda ejecutar más de una vez
+        operaciones = [
+            UpdateOne(
+                {"meme_id": meme["_id"], "usuario_id": usuario_id},
+                {"$setOnInsert": {"fecha": datetime.utcnow()}},
+                upsert=True
+            )
+            for usuario_id in set(meme.get("liked_by_users", []))
+        ]
+        if operaciones:
+            likes_collection.bulk_write(operaciones, ordered=False)
+
+        total = likes_collection.count_documents({"meme_id": meme["_id"]})
+        memes_collection.update_one(
+            {"_id": meme["_id"]},
+            {"$set": {"likes": total}, "$unset": {"liked_by_users": ""}}
+        )
+        migrados += len(operaciones)
+
+    print(f"Likes migrados: {migrados}")
+
+
+if __name__ == "__main__":
+    migrar_likes()
@@ -0,0 +1,45 @@
+"""
+Migración única: los memes subidos antes de normalizar las etiquetas las
+guardan tal como las escribió el usuario ("Gatos", " memes "). Este script
+las pasa al formato actual (sin espacios en los extremos y en minúsculas) y
+elimina las repetidas, para que la búsqueda por etiquetas también los encuentre.
+
+Uso (desde memeologia_back):
+
+    python -m scripts.normalizar_etiquetas
+
+Se puede ejecutar más de una vez; solo modifica los memes que lo necesitan.
+El autocompletado se reconstruye al reiniciar el servidor.
+"""
+from pymongo import UpdateOne
+from config.database_nosql import memes_collection
+from config.etiquetas import normalizar_etiqueta
+
+TAMANO_LOTE = 1000
+
+
+def normalizar_etiquetas():
+    operaciones = []
+    actualizados = 0
+
+    for meme in memes_collection.find({"etiquetas.0": {"$exists": True}}, {"etiquetas": 1}):
+        etiquetas = meme["etiquetas"]
+        # dict.fromkeys quita las repetidas manteniendo el orden original
+        normalizadas = list(dict.fromkeys(
+            e for e in (normalizar_etiqueta(e) for e in etiquetas if isinstance(e, str)) if e
+        ))
+        if normalizadas != etiquetas:
+            operaciones.append(UpdateOne({"_id": meme["_id"]}, {"$set": {"etiquetas": normalizadas}}))
+
+        if len(operaciones) >= TAMANO_LOTE:
+            actualizados += memes_collection.bulk_write(operaciones, ordered=False).modified_count
+            operaciones = []
+
+    if operaciones:
+        actualizados += memes_collection.bulk_write(operaciones, ordered=False).modified_count
+
+    print(f"Memes actualizados: {actualizados}")
+
+
+if __name__ == "__main__":
+    normalizar_etiquetas()
@@ -0,0 +1,32 @@
+"""
+Recalcula desde cero los agregados por usuario (memes subidos y likes
+recibidos) de la colección `usuarios_estadisticas`. Sirve para poblarla la
+primera vez o para corregirla si se desincroniza.
+
+Uso (desde memeologia_back):
+
+    python -m scripts.recalcular_estadisticas
+"""
+from pymongo import ReplaceOne
+from config.database_nosql import estadisticas_collection, memes_collection
+
+
+def recalcular_estadisticas():
+    agregados = memes_collection.aggregate([
+        {"$group": {
+            "_id": "$usuario_id",
+            "memes": {"$sum": 1},
+            "likes": {"$sum": {"$ifNull": ["$likes", 0]}}
+        }}
+    ])
+    operaciones = [
+        ReplaceOne({"_id": a["_id"]}, {"memes": a["memes"], "likes": a["likes"]}, upsert=True)
+        for a in agregados
+    ]
+    if operaciones:
+        estadisticas_collection.bulk_write(operaciones, ordered=False)
+    print(f"Usuarios actualizados: {len(operaciones)}")
+
+
+if __name__ == "__main__":
+    recalcular_estadisticas()
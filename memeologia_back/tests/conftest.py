@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Las pruebas no usan MySQL: la configuración SQL apunta a SQLite en memoria
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
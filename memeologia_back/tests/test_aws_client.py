@@ -0,0 +1,34 @@
+from io import BytesIO
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from config.aws_client import S3Uploader
+
+BUCKET = "memeologia-test"
+
+
+@pytest.fixture
+def cliente_s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    with mock_aws():
+        cliente = boto3.client("s3", region_name="us-east-1")
+        cliente.create_bucket(Bucket=BUCKET)
+        yield cliente
+
+
+@pytest.mark.asyncio
+async def test_sube_con_content_type(cliente_s3):
+    uploader = S3Uploader(bucket=BUCKET, region="us-east-1", client=cliente_s3)
+
+    # Sin content_type explícito se deduce de la extensión
+    url = await uploader.upload_async(BytesIO(b"webp"), "variantes/abc_feed_webp.webp")
+    assert url == f"https://{BUCKET}.s3.us-east-1.amazonaws.com/variantes/abc_feed_webp.webp"
+    objeto = cliente_s3.get_object(Bucket=BUCKET, Key="variantes/abc_feed_webp.webp")
+    assert objeto["ContentType"] == "image/webp"
+    assert objeto["Body"].read() == b"webp"
+
+    await uploader.upload_async(BytesIO(b"gif"), "memes/abc.gif", "image/gif")
+    assert cliente_s3.head_object(Bucket=BUCKET, Key="memes/abc.gif")["ContentType"] == "image/gif"
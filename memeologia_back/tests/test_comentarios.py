@@ -0,0 +1,37 @@
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+
+import routes.routes as routes
+
+MEME_ID = str(ObjectId())
+
+
+class ComentariosQueFallan:
+    async def insert_one(self, doc):
+        raise RuntimeError("Mongo no disponible")
+
+
+@pytest.mark.asyncio
+async def test_comentario_que_no_se_guarda_no_cambia_el_contador(monkeypatch):
+    incrementos = []
+
+    async def contar(meme_object_id, cambios, projection):
+        incrementos.append(cambios)
+        return {"_id": meme_object_id}
+
+    monkeypatch.setattr(routes, "async_comments_collection", ComentariosQueFallan())
+    monkeypatch.setattr(routes, "actualizar_contadores", contar)
+
+    app = FastAPI()
+    app.include_router(routes.router)
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+        respuesta = await cliente.post(
+            f"/memes/{MEME_ID}/comments",
+            json={"usuario_id": "1", "meme_id": MEME_ID, "fecha": "2026-10-17T12:00:00", "contenido": "jaja"}
+        )
+
+    assert respuesta.status_code == 500
+    assert incrementos == []
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+
+import routes.routes as routes
+
+MEME_LENTO = str(ObjectId())
+MEME_RAPIDO = str(ObjectId())
+
+
+class ColeccionLenta:
+    """Stand-in de la colección async: la consulta del meme lento tarda 0.5 s."""
+
+    async def find_one(self, filtro, projection=None):
+        if str(filtro["_id"]) == MEME_LENTO:
+            await asyncio.sleep(0.5)
+        return {"_id": filtro["_id"], "comment_count": 0}
+
+
+async def pagina_vacia(meme_id, cursor, limit):
+    return [], None
+
+
+@pytest.mark.asyncio
+async def test_consulta_lenta_no_bloquea_otras_peticiones(monkeypatch):
+    monkeypatch.setattr(routes, "async_memes_collection", ColeccionLenta())
+    monkeypatch.setattr(routes, "get_pagina_comentarios", pagina_vacia)
+
+    app = FastAPI()
+    app.include_router(routes.router)
+    terminados = []
+
+    async def pedir(cliente, meme_id):
+        respuesta = await cliente.get(f"/memes/{meme_id}/comments")
+        assert respuesta.status_code == 200
+        terminados.append(meme_id)
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+        lenta = asyncio.create_task(pedir(cliente, MEME_LENTO))
+        await asyncio.sleep(0.05)  # La petición lenta ya está esperando a Mongo
+        await asyncio.wait_for(pedir(cliente, MEME_RAPIDO), timeout=0.3)
+        await lenta
+
+    assert terminados == [MEME_RAPIDO, MEME_LENTO]
+
+
+@pytest.mark.asyncio
+async def test_perfil_sin_cache_no_bloquea_el_event_loop(monkeypatch):
+    def perfil_lento(db, usuario_ids):
+        time.sleep(0.5)  # Consulta SQL síncrona lenta
+        return {usuario_id: {"nombre": "Ana", "foto_perfil": "foto.jpg"} for usuario_id in usuario_ids}
+
+    async def estadisticas(usuario_id):
+        return {"memes": 0, "likes": 0}
+
+    monkeypatch.setattr(routes, "obtener_perfiles", perfil_lento)
+    monkeypatch.setattr(routes, "get_estadisticas_usuario", estadisticas)
+    monkeypatch.setattr(routes, "async_memes_collection", ColeccionLenta())
+    monkeypatch.setattr(routes, "get_pagina_comentarios", pagina_vacia)
+
+    app = FastAPI()
+    app.include_router(routes.router)
+    app.dependency_overrides[routes.get_db] = lambda: None
+
+    terminados = []
+
+    async def pedir(cliente, url):
+        respuesta = await cliente.get(url)
+        assert respuesta.status_code == 200
+        terminados.append(url)
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://test") as cliente:
+        perfil = asyncio.create_task(pedir(cliente, "/api/usuario/1/header"))
+        await asyncio.sleep(0.05)  # La consulta del perfil ya está en curso
+        await pedir(cliente, f"/memes/{MEME_RAPIDO}/comments")
+        await perfil
+
+    assert terminados == [f"/memes/{MEME_RAPIDO}/comments", "/api/usuario/1/header"]
+
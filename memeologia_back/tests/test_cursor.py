@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from schema.schemas_nosql import codificar_cursor, decodificar_cursor, filtro_despues_de_cursor
+
+
+def cursor_crudo(datos: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+
+
+def test_cursor_ida_y_vuelta():
+    fecha, doc_id = datetime(2026, 10, 17, 12, 30), ObjectId()
+    assert decodificar_cursor(codificar_cursor(fecha, doc_id)).valor == fecha
+    assert decodificar_cursor(codificar_cursor(0.25, doc_id, 3)).valor == 0.25
+    assert decodificar_cursor(codificar_cursor(None, doc_id)).valor is None
+
+
+@pytest.mark.parametrize("valor", [{"$ne": None}, ["a"], "texto", True])
+def test_valor_que_no_es_fecha_ni_numero_responde_400(valor):
+    cursor = cursor_crudo({"v": valor, "d": False, "i": str(ObjectId())})
+    with pytest.raises(HTTPException) as error:
+        filtro_despues_de_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_epoca_que_no_es_entero_responde_400():
+    cursor = cursor_crudo({"v": 1.0, "d": False, "i": str(ObjectId()), "e": {"$gt": 0}})
+    with pytest.raises(HTTPException) as error:
+        decodificar_cursor(cursor)
+    assert error.value.status_code == 400
@@ -0,0 +1,42 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from config.hashing import ServicioHash
+
+
+@pytest.mark.asyncio
+async def test_hash_y_verificacion_en_el_pool():
+    servicio = ServicioHash(workers=1, max_pendientes=4)
+    hash_almacenado = await servicio.hash("Contraseña1")
+
+    assert await servicio.verificar("Contraseña1", hash_almacenado) == (True, None)
+    assert (await servicio.verificar("Otra1234", hash_almacenado))[0] is False
+    assert servicio.metricas()["completados"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rechaza_con_503_si_la_cola_esta_llena():
+    servicio = ServicioHash(workers=1, max_pendientes=1)
+    primero = asyncio.create_task(servicio.hash("Contraseña1"))
+    await asyncio.sleep(0)  # El primer hash ya ocupa el único lugar
+
+    with pytest.raises(HTTPException) as error:
+        await servicio.hash("Contraseña2")
+    assert error.value.status_code == 503
+
+    await primero
+    assert servicio.metricas()["rechazados"] == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_muerto_responde_503_y_se_recrea_el_pool():
+    servicio = ServicioHash(workers=1, max_pendientes=4)
+    with pytest.raises(HTTPException) as error:
+        await servicio._ejecutar(os._exit, 1)  # El worker termina como si el sistema lo matara
+    assert error.value.status_code == 503
+
+    hash_almacenado = await servicio.hash("Contraseña1")
+    assert await servicio.verificar("Contraseña1", hash_almacenado) == (True, None)
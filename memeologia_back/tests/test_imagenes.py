@@ -0,0 +1,60 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import pytest
+from PIL import Image, ImageCms
+
+from config import imagenes
+from config.imagenes import elegir_variante, generar_variantes, procesar_imagen, variante_webp
+
+
+def imagen_con_metadatos(formato: str) -> bytes:
+    imagen = Image.new("RGB", (1000, 800), "red")
+    perfil = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    exif = Image.Exif()
+    exif[0x010F] = "Camara"  # Make
+    salida = BytesIO()
+    imagen.save(salida, formato, icc_profile=perfil, exif=exif)
+    return salida.getvalue()
+
+
+def test_variantes_sin_metadatos():
+    for formato in ("PNG", "JPEG"):
+        variantes = generar_variantes(imagen_con_metadatos(formato))
+        assert set(variantes) == {"thumb", "thumb_webp", "feed", "feed_webp"}
+        for contenido, _, _ in variantes.values():
+            imagen = Image.open(BytesIO(contenido))
+            assert "icc_profile" not in imagen.info
+            assert "exif" not in imagen.info
+            assert imagen.width <= 720
+
+
+def test_feed_trae_ambos_formatos():
+    meme = {"url_s3": "original.gif", "variantes": {"feed": "feed.png", "feed_webp": "feed.webp"}}
+    assert (elegir_variante(meme, "feed"), variante_webp(meme, "feed")) == ("feed.png", "feed.webp")
+    # Sin variantes (GIF animado) se usa el original y no hay WebP
+    assert (elegir_variante(meme, "thumb"), variante_webp(meme, "thumb")) == ("original.gif", None)
+
+
+def test_procesa_desde_la_ruta_del_archivo(tmp_path):
+    ruta = tmp_path / "meme.png"
+    ruta.write_bytes(imagen_con_metadatos("PNG"))
+    variantes, phash = procesar_imagen(str(ruta))
+    assert (variantes, phash) == procesar_imagen(ruta.read_bytes())
+
+
+@pytest.mark.asyncio
+async def test_imagen_invalida_no_tiene_variantes():
+    assert await imagenes.procesar_imagen_async(b"no es una imagen") == ({}, None)
+
+
+@pytest.mark.asyncio
+async def test_worker_muerto_no_se_oculta_y_el_pool_se_recrea(monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(imagenes, "procesar_imagen", os._exit)  # El worker termina como si el sistema lo matara
+        with pytest.raises(BrokenProcessPool):
+            await imagenes.procesar_imagen_async(1)
+
+    variantes, phash = await imagenes.procesar_imagen_async(imagen_con_metadatos("PNG"))
+    assert variantes and phash
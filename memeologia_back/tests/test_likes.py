@@ -0,0 +1,107 @@
+import asyncio
+import random
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from schema import schemas_nosql
+from schema.schemas_nosql import alternar_like
+
+AUTOR = 7
+
+
+async def ceder():
+    # Cada operación cede el event loop para que las peticiones se intercalen
+    await asyncio.sleep(random.random() / 1000)
+
+
+class ColeccionLikes:
+    """Stand-in de `likes` con el índice único (meme_id, usuario_id)."""
+
+    def __init__(self):
+        self.docs = set()
+
+    async def delete_one(self, filtro):
+        await ceder()
+        clave = (filtro["meme_id"], filtro["usuario_id"])
+        borrado = clave in self.docs
+        self.docs.discard(clave)
+        return SimpleNamespace(deleted_count=int(borrado))
+
+    async def insert_one(self, doc):
+        await ceder()
+        clave = (doc["meme_id"], doc["usuario_id"])
+        if clave in self.docs:
+            raise DuplicateKeyError("likes")
+        self.docs.add(clave)
+
+
+class ColeccionMemes:
+    """Stand-in de `memes` que aplica los incrementos del pipeline de actualizar_contadores."""
+
+    def __init__(self, meme_id):
+        self.memes = {meme_id: {"_id": meme_id, "usuario_id": AUTOR, "likes": 0}}
+
+    async def find_one_and_update(self, filtro, pipeline, projection=None, return_document=None):
+        await ceder()
+        meme = self.memes.get(filtro["_id"])
+        if meme is None:
+            return None
+        for campo, expresion in pipeline[0]["$set"].items():
+            meme[campo] = meme.get(campo, 0) + expresion["$add"][1]
+        return dict(meme)
+
+
+class ColeccionEstadisticas:
+    def __init__(self):
+        self.likes = {}
+
+    async def update_one(self, filtro, cambios, upsert=False):
+        await ceder()
+        self.likes[filtro["_id"]] = self.likes.get(filtro["_id"], 0) + cambios["$inc"]["likes"]
+
+
+@pytest.fixture
+def colecciones(monkeypatch):
+    meme_id = ObjectId()
+    likes, memes, estadisticas = ColeccionLikes(), ColeccionMemes(meme_id), ColeccionEstadisticas()
+    monkeypatch.setattr(schemas_nosql, "async_likes_collection", likes)
+    monkeypatch.setattr(schemas_nosql, "async_memes_collection", memes)
+    monkeypatch.setattr(schemas_nosql, "async_estadisticas_collection", estadisticas)
+    return meme_id, likes, memes, estadisticas
+
+
+def assert_contadores_coinciden(meme_id, likes, memes, estadisticas):
+    total = len([clave for clave in likes.docs if clave[0] == meme_id])
+    assert memes.memes[meme_id]["likes"] == total
+    assert estadisticas.likes.get(AUTOR, 0) == total
+
+
+@pytest.mark.asyncio
+async def test_likes_concurrentes_de_distintos_usuarios(colecciones):
+    meme_id, likes, memes, estadisticas = colecciones
+    resultados = await asyncio.gather(*(alternar_like(meme_id, usuario_id) for usuario_id in range(50)))
+
+    assert all(liked for liked, _ in resultados)
+    assert memes.memes[meme_id]["likes"] == 50
+    assert_contadores_coinciden(meme_id, likes, memes, estadisticas)
+
+
+@pytest.mark.asyncio
+async def test_toggles_concurrentes_del_mismo_usuario(colecciones):
+    meme_id, likes, memes, estadisticas = colecciones
+    for _ in range(20):
+        await asyncio.gather(*(alternar_like(meme_id, 1) for _ in range(5)))
+        assert memes.memes[meme_id]["likes"] in (0, 1)
+        assert_contadores_coinciden(meme_id, likes, memes, estadisticas)
+
+
+@pytest.mark.asyncio
+async def test_toggles_mezclados(colecciones):
+    meme_id, likes, memes, estadisticas = colecciones
+    toggles = [usuario_id for usuario_id in range(10) for _ in range(random.randint(1, 4))]
+    random.shuffle(toggles)
+    await asyncio.gather(*(alternar_like(meme_id, usuario_id) for usuario_id in toggles))
+    assert_contadores_coinciden(meme_id, likes, memes, estadisticas)
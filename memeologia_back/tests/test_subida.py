@@ -0,0 +1,20 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from fastapi import HTTPException
+
+from schema.schemas_nosql import TAMAÑO_BLOQUE, copiar_con_hash
+
+
+def test_copia_por_bloques_con_hash():
+    contenido = b"x" * (TAMAÑO_BLOQUE * 2 + 10)
+    destino = BytesIO()
+    assert copiar_con_hash(BytesIO(contenido), destino) == hashlib.sha256(contenido).hexdigest()
+    assert destino.getvalue() == contenido
+
+
+def test_archivo_demasiado_grande_responde_413():
+    with pytest.raises(HTTPException) as error:
+        copiar_con_hash(BytesIO(b"x" * (TAMAÑO_BLOQUE + 1)), BytesIO(), max_bytes=TAMAÑO_BLOQUE)
+    assert error.value.status_code == 413
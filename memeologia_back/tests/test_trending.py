@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from schema import schemas_nosql
+from schema.schemas_nosql import TRENDING_GRAVEDAD, calcular_score, codificar_cursor, decodificar_cursor, epoca_del_cursor
+
+
+def test_score_inicial_usa_la_edad_en_utc():
+    # Un meme recién subido (fecha en UTC) tiene edad 0, sin importar la zona del servidor
+    assert calcular_score(0, 0, datetime.utcnow()) == pytest.approx(1 / 2 ** TRENDING_GRAVEDAD, rel=1e-3)
+
+
+def test_un_like_nunca_baja_el_score():
+    fecha = datetime.utcnow() - timedelta(minutes=5)
+    assert calcular_score(1, 0, fecha) > calcular_score(0, 0, fecha)
+
+
+def test_cursor_trending_sigue_en_su_epoca(monkeypatch):
+    monkeypatch.setattr(schemas_nosql, "get_epoca_trending", lambda: 6)
+    assert epoca_del_cursor(decodificar_cursor(codificar_cursor(0.5, ObjectId(), 6))) == 6
+    # Un cursor de la época anterior sigue sirviendo: su ranking no se tocó
+    assert epoca_del_cursor(decodificar_cursor(codificar_cursor(0.5, ObjectId(), 5))) == 5
+
+
+def test_cursor_trending_viejo_pide_volver_a_empezar(monkeypatch):
+    monkeypatch.setattr(schemas_nosql, "get_epoca_trending", lambda: 6)
+    for cursor in (codificar_cursor(0.5, ObjectId(), 4), codificar_cursor(0.5, ObjectId())):
+        with pytest.raises(HTTPException) as error:
+            epoca_del_cursor(decodificar_cursor(cursor))
+        assert error.value.status_code == 410
+
+
+class ColeccionTrending:
+    """Stand-in de la colección que devuelve los memes en el orden pedido, sin filtrar."""
+
+    def __init__(self, memes):
+        self.memes = memes
+        self.consultas = []
+
+    def find(self, filtro, projection=None):
+        self.consultas.append(filtro)
+        coleccion = self
+
+        class Consulta:
+            def sort(self, orden):
+                self.campo = orden[0][0]
+                return self
+
+            def limit(self, n):
+                return iter(sorted(coleccion.memes, key=lambda m: -m[self.campo])[:n])
+
+        return Consulta()
+
+
+def test_primera_pagina_usa_el_puntaje_vivo(monkeypatch):
+    # El meme 0 recibió likes después del decaimiento: su copia del ranking quedó atrás
+    memes = [{"_id": ObjectId(), "score": 10 - i, "ranking_1": i} for i in range(3)]
+    monkeypatch.setattr(schemas_nosql, "memes_collection", ColeccionTrending(memes))
+    monkeypatch.setattr(schemas_nosql, "get_epoca_trending", lambda: 1)
+
+    pagina, cursor = schemas_nosql.get_pagina_trending("", 2)
+    assert pagina == memes[:2]
+    datos = decodificar_cursor(cursor)
+    assert (datos.epoca, datos.vistos) == (1, (memes[0]["_id"], memes[1]["_id"]))
+
+    # La página siguiente recorre la copia del ranking sin los memes ya mostrados
+    schemas_nosql.get_pagina_trending(cursor, 2)
+    assert schemas_nosql.memes_collection.consultas[-1] == {"$and": [{"_id": {"$nin": list(datos.vistos)}}]}
+
+
+class EstadoTrending:
+    """Stand-in del documento de estado con la semántica de update_one con upsert."""
+
+    def __init__(self):
+        self.proximo = None
+
+    async def update_one(self, filtro, cambios, upsert=False):
+        await asyncio.sleep(0)
+        limite = filtro["$or"][0]["proximo_decaimiento"]["$lte"]
+        if self.proximo is not None and self.proximo > limite:
+            # El filtro no coincide y el upsert choca con el _id existente
+            raise DuplicateKeyError("trending")
+        self.proximo = cambios["$set"]["proximo_decaimiento"]
+
+
+@pytest.mark.asyncio
+async def test_solo_un_proceso_reserva_el_decaimiento(monkeypatch):
+    monkeypatch.setattr(schemas_nosql, "async_trending_collection", EstadoTrending())
+    reservas = await asyncio.gather(*(schemas_nosql.reservar_decaimiento(600) for _ in range(4)))
+    assert sorted(reservas) == [False, False, False, True]
+    # Dentro del mismo intervalo nadie más la obtiene
+    assert not await schemas_nosql.reservar_decaimiento(600)
@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from config.cache import principales_cache
+from models.models_sql import Base, Usuario, UsuarioActual
+from schema.schemas_nosql import create_access_token, get_current_user
+from schema.schemas_sql import invalidar_perfil
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    sesion = sessionmaker(bind=engine)()
+    sesion.add(Usuario(
+        usuario_id=1,
+        nombre="memero",
+        email="memero@example.com",
+        contraseña="x" * 60,
+        fecha_registro=date(2024, 1, 1)
+    ))
+    sesion.commit()
+    principales_cache.clear()
+    yield sesion
+    sesion.close()
+    principales_cache.clear()
+
+
+def test_get_current_user_carga_y_cachea_el_usuario(db):
+    token = create_access_token({"usuario_id": 1})
+
+    usuario = get_current_user(token, db)
+    assert isinstance(usuario, UsuarioActual)
+    assert usuario.usuario_id == 1
+    assert usuario.nombre == "memero"
+    assert principales_cache.get(1) == usuario
+
+    # La segunda vez sale de la caché, aunque el usuario ya no esté en la base
+    db.query(Usuario).delete()
+    db.commit()
+    assert get_current_user(token, db) == usuario
+
+
+def test_invalidar_perfil_vacia_la_cache(db):
+    token = create_access_token({"usuario_id": 1})
+    get_current_user(token, db)
+
+    invalidar_perfil(1)
+    db.query(Usuario).delete()
+    db.commit()
+
+    with pytest.raises(HTTPException) as error:
+        get_current_user(token, db)
+    assert error.value.status_code == 404
@@ -1,6 +1,5 @@
 import re
 from fastapi import HTTPException
-from config.database_nosql import pwd_context
 from config.database_sql import get_db
 from models.models_sql import Usuario
 from sqlalchemy.orm import Session
@@ -36,14 +35,3 @@ def validar_contraseña(contraseña: str):
     if not re.search("[0-9]", contraseña):
         raise HTTPException(status_code=400, detail="La contraseña debe contener al menos un número")
     
-
-# Función para verificar la contraseña
-def verificar_contraseña(hash_almacenado, contraseña_proporcionada):
-    # Verificar si la contraseña proporcionada coincide con el hash almacenado
-    return pwd_context.verify(contraseña_proporcionada, hash_almacenado)
-
-# Función para verificar si un usuario existe
-def verificar_id(id: int, db: Session):
-    usuario = db.query(Usuario).filter(Usuario.usuario_id == id).first()
-    if not usuario:
-        raise HTTPException(status_code=404, detail="Usuario no encontrado")
\ No newline at end of file
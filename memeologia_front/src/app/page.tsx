@@ -5,6 +5,7 @@ import { useRouter } from "next/navigation";
 interface Meme {
   id: string;
   imageUrl: string;
+  imageUrlWebp?: string | null;
   likes: number;
   reports: number;
   usuario_id: string;
@@ -24,7 +25,7 @@ const Inicio: React.FC = () => {
         const response = await fetch(`http://200.104.72.42:8000/memes?page=${page}&limit=20`);
         if (response.ok) {
           const memeData = await response.json();
-          setMemes(memeData.reverse()); // Invertimos para que los memes más recientes estén primero
+          setMemes(memeData); // El backend ya los devuelve con los más recientes primero
           setLoading(false);
         } else {
           console.error("Error al obtener los memes");
@@ -126,11 +127,14 @@ const Inicio: React.FC = () => {
             </div>
 
             <div className="flex justify-center bg-gray-100 p-4 h-[400px]">
-              <img
-                src={meme.imageUrl}
-                alt="Meme"
-                className="w-full h-full object-contain rounded-lg"
-              />
+              <picture className="w-full h-full">
+                {meme.imageUrlWebp && <source srcSet={meme.imageUrlWebp} type="image/webp" />}
+                <img
+                  src={meme.imageUrl}
+                  alt="Meme"
+                  className="w-full h-full object-contain rounded-lg"
+                />
+              </picture>
             </div>
 
             <div className="p-4 flex justify-between items-center">